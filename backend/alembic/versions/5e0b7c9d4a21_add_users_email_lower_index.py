@@ -0,0 +1,26 @@
+"""add users lower(email) index
+
+Revision ID: 5e0b7c9d4a21
+Revises: c12a3d51042a
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e0b7c9d4a21'
+down_revision = 'c12a3d51042a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Login, register and password reset match emails case-insensitively
+    # with lower(email) = :email, which ix_users_email can't serve
+    op.execute("CREATE INDEX IF NOT EXISTS ix_users_email_lower ON public.users (lower(email))")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS public.ix_users_email_lower")
@@ -0,0 +1,26 @@
+"""add clients keyset pagination index
+
+Revision ID: 9a4f2e6b1c83
+Revises: 5e0b7c9d4a21
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a4f2e6b1c83'
+down_revision = '5e0b7c9d4a21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Serves GET /clients pages: a user's clients newest first, seeking past
+    # the (created_at, id) cursor instead of scanning OFFSET rows
+    op.execute("CREATE INDEX IF NOT EXISTS ix_clients_user_id_created_at_id ON public.clients (user_id, created_at, id)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS public.ix_clients_user_id_created_at_id")
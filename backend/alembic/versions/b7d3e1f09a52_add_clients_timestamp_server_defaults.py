@@ -0,0 +1,28 @@
+"""add server defaults to clients timestamps
+
+Revision ID: b7d3e1f09a52
+Revises: 9a4f2e6b1c83
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d3e1f09a52'
+down_revision = '9a4f2e6b1c83'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Clients are stamped by the database instead of datetime.utcnow() in the
+    # API; the columns are naive UTC, so convert now() whatever the TimeZone
+    op.alter_column('clients', 'created_at', server_default=sa.text("timezone('utc', now())"), schema='public')
+    op.alter_column('clients', 'updated_at', server_default=sa.text("timezone('utc', now())"), schema='public')
+
+
+def downgrade() -> None:
+    op.alter_column('clients', 'updated_at', server_default=None, schema='public')
+    op.alter_column('clients', 'created_at', server_default=None, schema='public')
@@ -0,0 +1,26 @@
+"""add workouts client_id/date index
+
+Revision ID: c12a3d51042a
+Revises: 32a96dcc6138
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c12a3d51042a'
+down_revision = '32a96dcc6138'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Serves "this client's workouts, newest first" and date-range queries
+    # per client straight from the index, without a sort
+    op.execute("CREATE INDEX IF NOT EXISTS ix_workouts_client_id_date ON public.workouts (client_id, date)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS public.ix_workouts_client_id_date")
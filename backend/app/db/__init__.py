@@ -12,6 +12,7 @@ from .config import (
     database,
     get_db,
     get_async_db,
+    get_async_session_factory,
     connect_to_db,
     disconnect_from_db
 )
@@ -28,5 +29,7 @@ from .repositories import (
     WorkoutTemplateRepository,
     AsyncWorkoutTemplateRepository,
     TemplateExerciseRepository,
-    AsyncTemplateExerciseRepository
+    AsyncTemplateExerciseRepository,
+    get_client_repository,
+    get_workout_repository
 ) 
\ No newline at end of file
@@ -34,8 +34,10 @@ if not PG_URL:
     DB_PASS = os.getenv("DB_PASS", "")  # Empty password as default
     PG_URL = f"postgresql://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
-# Derive the async URL from standard PostgreSQL URL
-ASYNC_PG_URL = PG_URL.replace("postgresql://", "postgresql+asyncpg://")
+# Derive the async URL from the standard PostgreSQL URL. Render hands out
+# postgres:// URLs, and a URL may already name a sync driver; either way the
+# async engine must use asyncpg so queries never block the event loop
+ASYNC_PG_URL = "postgresql+asyncpg://" + PG_URL.split("://", 1)[1]
 
 # Print for debugging
 # Mask password in logs for security
@@ -51,9 +53,18 @@ print(f"Using PostgreSQL connection: {masked_url}")
 DATABASE_URL = PG_URL
 ASYNC_DATABASE_URL = ASYNC_PG_URL
 
+# Async connection pool shared by all request handlers
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "40"))
+
 # Create database engines
 engine = create_engine(DATABASE_URL)
-async_engine = create_async_engine(ASYNC_DATABASE_URL)
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_pre_ping=True  # Replace connections the server has closed
+)
 
 # Create session factories
 SessionLocal = sessionmaker(
@@ -103,6 +114,10 @@ async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
     async with AsyncSessionLocal() as session:
         yield session
 
+def get_async_session_factory() -> sessionmaker:
+    """Get the factory for asynchronous sessions, for handlers that open several at once."""
+    return AsyncSessionLocal
+
 # Connect and disconnect methods for startup/shutdown events
 @lru_cache
 def database():
@@ -121,21 +136,20 @@ async def connect_to_db():
         try:
             # Test connection by making a simple query
             print(f"Connection attempt {attempt}/{max_retries}...")
-            conn = await database()["async_engine"].connect()
-            
-            # Test a simple query to see if the database is working
-            # Note: We use text() to convert the string to an executable SQL statement
-            await conn.execute(text("SELECT 1"))
-            print("PostgreSQL connection test successful")
-            
-            # Create tables if they don't exist yet
-            from app.db.models import Client, Workout, Exercise, APIKey
-            
-            # Use create_all to create tables that don't exist yet
-            # This is safe to call even if tables already exist
-            print("Ensuring database tables exist...")
-            Base.metadata.create_all(bind=engine)
-            print("Database tables verified/created")
+            async with database()["async_engine"].begin() as conn:
+                # Test a simple query to see if the database is working
+                # Note: We use text() to convert the string to an executable SQL statement
+                await conn.execute(text("SELECT 1"))
+                print("PostgreSQL connection test successful")
+                
+                # Create tables if they don't exist yet
+                from app.db.models import Client, Workout, Exercise, APIKey
+                
+                # Use create_all to create tables that don't exist yet
+                # This is safe to call even if tables already exist
+                print("Ensuring database tables exist...")
+                await conn.run_sync(Base.metadata.create_all)
+                print("Database tables verified/created")
             
             # If we get here, connection was successful
             return
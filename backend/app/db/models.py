@@ -11,7 +11,7 @@ from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .config import Base, metadata
-from .models_helper import get_table_args, get_foreign_key_target
+from .models_helper import get_table_args, get_foreign_key_target, utcnow
 
 class User(Base):
     """User model representing application users with authentication and authorization details."""
@@ -34,6 +34,9 @@ class User(Base):
     def __repr__(self):
         return f"<User {self.email}>"
 
+# Case-insensitive email lookups (login, register, password reset)
+Index('ix_users_email_lower', func.lower(User.email))
+
 class Client(Base):
     """Client model representing fitness clients/users."""
     __tablename__ = "clients"
@@ -50,18 +53,22 @@ class Client(Base):
     phone = Column(String(20), nullable=True)
     notes = Column(Text, nullable=True)
     api_key = Column(String(255), nullable=True, unique=True)
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=True)
+    # Stamped by the database in UTC; eager_defaults reads them back with the INSERT
+    created_at = Column(DateTime, server_default=utcnow(), nullable=False)
+    updated_at = Column(DateTime, server_default=utcnow(), onupdate=utcnow(), nullable=True)
     
     # Relationships
     workouts = relationship("Workout", back_populates="client", cascade="all, delete-orphan")
     user = relationship("User", back_populates="clients")
     
+    __mapper_args__ = {"eager_defaults": True}
+    
     # Add unique constraint for email per user (clients with same email can exist for different users)
     __table_args__ = get_table_args([
         Index('ix_clients_email', 'email'),
         Index('ix_clients_name', 'name'),
         Index('ix_clients_user_id', 'user_id'),
+        Index('ix_clients_user_id_created_at_id', 'user_id', 'created_at', 'id'),
         UniqueConstraint('user_id', 'email', name='uq_client_email_per_user')
     ])
     
@@ -73,7 +80,8 @@ class Workout(Base):
     __tablename__ = "workouts"
     __table_args__ = get_table_args([
         Index('ix_workouts_client_id', 'client_id'),
-        Index('ix_workouts_date', 'date')
+        Index('ix_workouts_date', 'date'),
+        Index('ix_workouts_client_id_date', 'client_id', 'date')
     ])
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
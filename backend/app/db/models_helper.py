@@ -6,6 +6,9 @@ to work with PostgreSQL.
 """
 
 from typing import Any, Dict, List, Tuple, Union
+from sqlalchemy import DateTime
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
 
 def get_table_args(indexes: List[Any] = None) -> Union[Tuple, Dict[str, Any]]:
     """
@@ -36,4 +39,25 @@ def get_foreign_key_target(table_name: str) -> str:
         The full table reference with schema for PostgreSQL
     """
     # Always include schema for PostgreSQL
-    return f"public.{table_name}" 
\ No newline at end of file
+    return f"public.{table_name}"
+
+class utcnow(FunctionElement):
+    """
+    The database's current time in UTC, as a naive timestamp.
+    
+    Matches datetime.utcnow() whatever the session's TimeZone setting,
+    for use as a server-side column default.
+    """
+    type = DateTime()
+    inherit_cache = True
+
+@compiles(utcnow)
+def _default_utcnow(element, compiler, **kw):
+    # SQLite's CURRENT_TIMESTAMP is already UTC
+    return "CURRENT_TIMESTAMP"
+
+@compiles(utcnow, "postgresql")
+def _pg_utcnow(element, compiler, **kw):
+    # now() is a timestamptz; convert it to UTC before it is stored in a
+    # timestamp without time zone column
+    return "timezone('UTC', now())"
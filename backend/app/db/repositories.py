@@ -5,13 +5,16 @@ This module provides repository classes for database operations,
 implementing the repository pattern to abstract database access.
 """
 
-from typing import List, Optional, Dict, Any, Type, TypeVar, Generic
+from typing import List, Optional, Dict, Any, Type, TypeVar, Generic, Tuple
 from uuid import UUID
-from sqlalchemy.orm import Session
+from datetime import datetime
+from sqlalchemy.orm import Session, selectinload, aliased
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import update, delete, text
+from sqlalchemy import update, delete, text, func, tuple_, exists
+from fastapi import Depends
 from .models import User, Client, Workout, Exercise, APIKey, WorkoutTemplate, TemplateExercise
+from .config import get_async_db
 import logging
 
 logger = logging.getLogger(__name__)
@@ -197,12 +200,38 @@ class ClientRepository(BaseRepository[Client]):
             
         return query.offset(skip).limit(limit).all()
 
+# Columns of a client as the API lists them, without loading ORM instances
+CLIENT_LISTING_COLUMNS = (
+    Client.id,
+    Client.name,
+    Client.email,
+    func.coalesce(Client.phone, "").label("phone"),
+    func.coalesce(Client.notes, "").label("notes"),
+    Client.created_at,
+    Client.updated_at,
+)
+
 class AsyncClientRepository(AsyncBaseRepository[Client]):
     """Async repository for Client model operations."""
     
     def __init__(self, session: AsyncSession):
         super().__init__(session, Client)
     
+    async def create(self, data: Dict[str, Any]) -> Client:
+        """Create a new client.
+        
+        No refresh: the server-stamped timestamps come back with the INSERT.
+        """
+        try:
+            db_client = Client(**data)
+            self.session.add(db_client)
+            await self.session.commit()
+            return db_client
+        except Exception as e:
+            print(f"Error in create: {e}")
+            await self.session.rollback()
+            raise
+    
     async def get_by_email(self, email: str, user_id: UUID) -> Optional[Client]:
         """Get a client by email and user ID for data isolation."""
         result = await self.session.execute(
@@ -221,6 +250,41 @@ class AsyncClientRepository(AsyncBaseRepository[Client]):
         result = await self.session.execute(query)
         return result.scalars().first()
     
+    async def count_all(self, user_id: UUID = None) -> int:
+        """Count all clients, with optional user isolation."""
+        query = select(func.count()).select_from(Client)
+        
+        # Apply user isolation unless user_id is None (admin bypass)
+        if user_id is not None:
+            query = query.where(Client.user_id == user_id)
+        
+        result = await self.session.execute(query)
+        return result.scalar_one()
+    
+    async def estimate_table_size(self) -> Optional[int]:
+        """Planner's estimate of the clients table size from pg_class, or None if unavailable."""
+        try:
+            result = await self.session.execute(
+                text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'public.clients'::regclass")
+            )
+            return result.scalar_one_or_none()
+        except Exception as e:
+            # Not PostgreSQL (e.g. the SQLite test database)
+            logger.debug(f"Could not estimate clients table size: {e}")
+            await self.session.rollback()
+            return None
+    
+    async def count_since(self, since: datetime, user_id: UUID = None) -> int:
+        """Count clients created on or after a date, with optional user isolation."""
+        query = select(func.count()).select_from(Client).where(Client.created_at >= since)
+        
+        # Apply user isolation unless user_id is None (admin bypass)
+        if user_id is not None:
+            query = query.where(Client.user_id == user_id)
+        
+        result = await self.session.execute(query)
+        return result.scalar_one()
+    
     async def get_all(self, skip: int = 0, limit: int = 100, user_id: UUID = None) -> List[Client]:
         """Get all clients with pagination and optional user isolation."""
         try:
@@ -283,6 +347,92 @@ class AsyncClientRepository(AsyncBaseRepository[Client]):
             except Exception as inner_e:
                 print(f"Error in fallback query: {inner_e}")
                 return []
+    
+    async def get_page(self, limit: int = 100, after: Optional[Tuple[datetime, UUID]] = None, user_id: UUID = None) -> List[Dict[str, Any]]:
+        """Get a page of clients as plain dicts, newest first, with optional user isolation.
+        
+        Keyset pagination: after is the (created_at, id) of the last client on
+        the previous page, so each page is an index seek instead of an OFFSET scan.
+        """
+        query = select(*CLIENT_LISTING_COLUMNS)
+        
+        # Apply user isolation unless user_id is None (admin bypass)
+        if user_id is not None:
+            query = query.where(Client.user_id == user_id)
+        
+        if after is not None:
+            # A plain tuple is bound with the columns' types (UUID, DateTime)
+            query = query.where(tuple_(Client.created_at, Client.id) < tuple(after))
+        
+        result = await self.session.execute(
+            query.order_by(Client.created_at.desc(), Client.id.desc()).limit(limit)
+        )
+        return [dict(row) for row in result.mappings()]
+    
+    async def atomic_update(self, id: UUID, data: Dict[str, Any], user_id: UUID = None) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """Update a client in one statement, refusing an email another of the user's clients has.
+        
+        Returns (client, email_conflict): the updated client as a plain dict,
+        or None with email_conflict telling "already in use" from "not found".
+        """
+        stmt = update(Client).where(Client.id == id)
+        
+        # Apply user isolation unless user_id is None (admin bypass)
+        if user_id is not None:
+            stmt = stmt.where(Client.user_id == user_id)
+        
+        if data.get("email") is not None:
+            other = aliased(Client)
+            stmt = stmt.where(~exists().where(
+                other.user_id == Client.user_id,
+                other.email == data["email"],
+                other.id != id,
+            ))
+        
+        stmt = stmt.values(**data).execution_options(synchronize_session=False)
+        try:
+            if self.session.bind.dialect.full_returning:
+                result = await self.session.execute(stmt.returning(*CLIENT_LISTING_COLUMNS))
+                client = result.mappings().first()
+            else:
+                # No UPDATE ... RETURNING (the SQLite test database)
+                result = await self.session.execute(stmt)
+                client = None
+                if result.rowcount:
+                    result = await self.session.execute(
+                        select(*CLIENT_LISTING_COLUMNS).where(Client.id == id)
+                    )
+                    client = result.mappings().first()
+            await self.session.commit()
+        except Exception as e:
+            print(f"Error in atomic_update: {e}")
+            await self.session.rollback()
+            raise
+        
+        if client is not None:
+            return dict(client), False
+        
+        # Nothing matched: only a lookup on the failure path tells the two cases apart
+        if data.get("email") is None:
+            return None, False
+        query = select(Client.id).where(Client.id == id)
+        if user_id is not None:
+            query = query.where(Client.user_id == user_id)
+        result = await self.session.execute(query)
+        return None, result.scalar_one_or_none() is not None
+    
+    async def search_by_name(self, name: str, user_id: UUID = None) -> List[Dict[str, Any]]:
+        """Get clients whose name contains name (case-insensitive) as plain dicts."""
+        query = select(*CLIENT_LISTING_COLUMNS).where(
+            func.lower(Client.name).contains(name.lower(), autoescape=True)
+        )
+        
+        # Apply user isolation unless user_id is None (admin bypass)
+        if user_id is not None:
+            query = query.where(Client.user_id == user_id)
+        
+        result = await self.session.execute(query.order_by(Client.name))
+        return [dict(row) for row in result.mappings()]
 
 class WorkoutRepository(BaseRepository[Workout]):
     """Repository for Workout model operations."""
@@ -344,6 +494,51 @@ class AsyncWorkoutRepository(AsyncBaseRepository[Workout]):
         )
         return result.scalars().all()
     
+    async def get_by_client_with_exercises(self, client_id: UUID, skip: int = 0, limit: int = 100) -> List[Workout]:
+        """Get a client's workouts, newest first, with their exercises loaded."""
+        result = await self.session.execute(
+            select(Workout)
+            .where(Workout.client_id == client_id)
+            .options(selectinload(Workout.exercises))
+            .order_by(Workout.date.desc())
+            .offset(skip)
+            .limit(limit)
+        )
+        return result.scalars().all()
+    
+    async def count_since(self, since: Optional[datetime] = None, user_id: UUID = None) -> int:
+        """Count workouts on or after a date (all workouts if since is None), with optional user isolation."""
+        query = select(func.count()).select_from(Workout)
+        if since is not None:
+            query = query.where(Workout.date >= since)
+        
+        # Join with clients to filter by user_id
+        if user_id is not None:
+            query = query.join(Client, Workout.client_id == Client.id).where(Client.user_id == user_id)
+        
+        result = await self.session.execute(query)
+        return result.scalar_one()
+    
+    async def top_exercises(self, since: Optional[datetime] = None, limit: int = 10, user_id: UUID = None) -> List[Tuple[str, int]]:
+        """Most performed exercises as (name, count), in workouts on or after a date if given."""
+        count = func.count(Exercise.id)
+        query = (
+            select(Exercise.name, count)
+            .join(Workout, Exercise.workout_id == Workout.id)
+            .group_by(Exercise.name)
+            .order_by(count.desc())
+            .limit(limit)
+        )
+        if since is not None:
+            query = query.where(Workout.date >= since)
+        
+        # Join with clients to filter by user_id
+        if user_id is not None:
+            query = query.join(Client, Workout.client_id == Client.id).where(Client.user_id == user_id)
+        
+        result = await self.session.execute(query)
+        return [(name, total) for name, total in result.all()]
+    
     async def get_all(self, skip: int = 0, limit: int = 100, user_id: UUID = None) -> List[Workout]:
         """Get all workouts with pagination and optional user isolation."""
         try:
@@ -717,4 +912,15 @@ class AsyncTemplateExerciseRepository(AsyncBaseRepository[TemplateExercise]):
         except Exception as e:
             await self.session.rollback()
             print(f"Error in create_for_template: {e}")
-            raise 
\ No newline at end of file
+            raise 
+
+# FastAPI dependencies. Handlers and their sub-dependencies that ask for the
+# same repository in one request share a single instance through FastAPI's
+# per-request dependency cache.
+def get_client_repository(db: AsyncSession = Depends(get_async_db)) -> AsyncClientRepository:
+    """Client repository bound to the request's database session."""
+    return AsyncClientRepository(db)
+
+def get_workout_repository(db: AsyncSession = Depends(get_async_db)) -> AsyncWorkoutRepository:
+    """Workout repository bound to the request's database session."""
+    return AsyncWorkoutRepository(db)
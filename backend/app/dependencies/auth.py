@@ -37,7 +37,7 @@ async def get_current_user(
         HTTPException: If the credentials are invalid.
     """
     try:
-        payload = auth_service.validate_token(credentials.credentials)
+        payload = auth_service.validate_token_cached(credentials.credentials)
         
         # Get role from the most appropriate place
         # First check user_metadata.role (Supabase custom role), then top-level role
@@ -158,7 +158,7 @@ async def get_user_from_token_or_api_key(
     if authorization:
         try:
             token = auth_service.extract_token_from_authorization(authorization)
-            payload = auth_service.validate_token(token)
+            payload = auth_service.validate_token_cached(token)
             
             # Get role from the most appropriate place
             # First check user_metadata.role (Supabase custom role), then top-level role
@@ -1,9 +1,14 @@
 from fastapi import FastAPI, Depends, HTTPException, Security, status, Request, Header
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.openapi.utils import get_openapi
 from fastapi.security import APIKeyHeader
 from typing import Optional, List, Dict, Any
 import os
+import asyncio
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from datetime import datetime
 from contextlib import asynccontextmanager
 from dotenv import load_dotenv
@@ -12,12 +17,16 @@ from dotenv import load_dotenv
 from app.utils.response import StandardResponse, API_VERSION
 
 # Import database components
-from app.db import connect_to_db, disconnect_from_db, AsyncAPIKeyRepository, get_async_db
+from app.db import connect_to_db, disconnect_from_db, AsyncAPIKeyRepository, get_async_db, async_engine
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
 
 # Import middleware
 from app.middleware import DatabaseErrorMiddleware, RequestLoggingMiddleware
 
+# Shared OpenAI client, closed on shutdown
+from app.utils.openai_client import close_openai_client
+
 # Try to import models with error handling
 try:
     from app.db.models import WorkoutTemplate, TemplateExercise
@@ -36,14 +45,44 @@ from app.routers import ai_analysis, ocr, nutrition, templates
 # Load environment variables
 load_dotenv()
 
+async def warm_db_pool():
+    """Open a few pooled connections up front so the first requests skip the handshake."""
+    async def _warm():
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    pool_size = int(os.getenv("DB_WARM_POOL", "5"))
+    await asyncio.gather(*[_warm() for _ in range(pool_size)])
+
+def start_log_listener() -> QueueListener:
+    """Send log records through a queue so handler I/O happens off the request path."""
+    root = logging.getLogger()
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    handlers = root.handlers or [logging.StreamHandler()]
+    for handler in handlers:
+        if handler.formatter is None:
+            handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    log_queue = queue.SimpleQueue()
+    root.handlers = [QueueHandler(log_queue)]
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
+
 # Create the lifespan context manager
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    log_listener = start_log_listener()
     # Startup: Connect to database
     print("Starting up API server...")
     try:
         await connect_to_db()
         print("Database connection successful")
+        try:
+            await warm_db_pool()
+            print("Database connection pool warmed")
+        except Exception as e:
+            print(f"Warning: Could not warm database connection pool: {str(e)}")
     except Exception as e:
         print(f"ERROR during startup: {str(e)}")
         print("The application will continue to run but may not function correctly")
@@ -53,13 +92,17 @@ async def lifespan(app: FastAPI):
     # Shutdown: Disconnect from database
     print("Shutting down API server...")
     await disconnect_from_db()
+    await close_openai_client()
+    log_listener.stop()
 
 # Create FastAPI app with lifespan
 app = FastAPI(
     title="Trainer's Memory API",
     description="API for personal trainers to manage clients and workouts",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    # Serialize every response body with orjson instead of stdlib json
+    default_response_class=ORJSONResponse
 )
 
 # Log the port we're using for Render's benefit
@@ -103,7 +146,7 @@ app.add_middleware(DatabaseErrorMiddleware)
 app.add_middleware(RequestLoggingMiddleware)
 
 # Add API key authentication scheme
-api_key_header = APIKeyHeader(name=API_KEY_NAME, auto_error=False)
+api_key_header = APIKeyHeader(name=API_KEY_NAME, scheme_name=API_KEY_NAME, auto_error=False)
 
 # Add a simple health check endpoint at root
 @app.get("/")
@@ -188,15 +231,8 @@ def custom_openapi():
         }
     }
     
-    # Apply security to ALL operations explicitly
-    # This ensures every endpoint requires the API key
-    if "paths" in openapi_schema:
-        for path_key, path in openapi_schema["paths"].items():
-            for operation_key, operation in path.items():
-                if "security" not in operation:
-                    operation["security"] = [{API_KEY_NAME: []}]
-    
-    # Also keep the global security definition
+    # Router operations carry the API key requirement from their include_router
+    # dependencies; the global definition covers the remaining endpoints
     openapi_schema["security"] = [{API_KEY_NAME: []}]
     
     # Make sure the schemas section exists
@@ -242,60 +278,77 @@ app.include_router(
     clients.router,
     prefix=f"/api/{API_VERSION}",
     tags=["Clients"],
+    dependencies=[Security(api_key_header)],
 )
 
 app.include_router(
     workouts.router,
     prefix=f"/api/{API_VERSION}",
     tags=["Workouts"],
+    dependencies=[Security(api_key_header)],
 )
 
 app.include_router(
     templates.router, 
     prefix=f"/api/{API_VERSION}",
     tags=["Templates"],
+    dependencies=[Security(api_key_header)],
 )
 
 app.include_router(
     intelligence.router,
     prefix=f"/api/{API_VERSION}/intelligence",
     tags=["Intelligence"],
+    dependencies=[Security(api_key_header)],
+)
+
+app.include_router(
+    ai_analysis.router,
+    prefix=f"/api/{API_VERSION}/intelligence/analysis",
+    tags=["Intelligence"],
+    dependencies=[Security(api_key_header)],
 )
 
 app.include_router(
     transformation.router,
     prefix=f"/api/{API_VERSION}/transformation",
     tags=["Transformation"],
+    dependencies=[Security(api_key_header)],
 )
 
 app.include_router(
     communication.router,
     prefix=f"/api/{API_VERSION}/communication",
     tags=["Communication"],
+    dependencies=[Security(api_key_header)],
 )
 
 app.include_router(
     analytics.router,
     prefix=f"/api/{API_VERSION}/analytics",
     tags=["Analytics"],
+    dependencies=[Security(api_key_header)],
 )
 
 app.include_router(
     coaching.router,
     prefix=f"/api/{API_VERSION}/coaching",
     tags=["Coaching"],
+    dependencies=[Security(api_key_header)],
 )
 
 app.include_router(
     content.router,
     prefix=f"/api/{API_VERSION}/content",
     tags=["Content"],
+    dependencies=[Security(api_key_header)],
 )
 
 app.include_router(
     nutrition.router,
     prefix=f"/api/{API_VERSION}/nutrition",
     tags=["Nutrition"],
+    dependencies=[Security(api_key_header)],
 )
 
 # Entry point
@@ -1,30 +1,259 @@
 import pytesseract
+import aiopytesseract
 from PIL import Image
+import asyncio
 import io
+import os
 import re
+import shlex
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
+
+# In-process Tesseract bindings avoid a subprocess per image; optional
+try:
+    from tesserocr import PyTessBaseAPI
+except ImportError:
+    PyTessBaseAPI = None
+
+# Date formats recognised in OCR text, tried in order ("%y" before "%Y" so
+# two-digit years are not read as year 0023)
+DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%y", "%m/%d/%Y")
+# The date pattern only matches dashed ISO dates or slashed US dates, so the
+# separator alone picks which formats can apply
+_DASH_DATE_FORMATS = tuple(fmt for fmt in DATE_FORMATS if '-' in fmt)
+_SLASH_DATE_FORMATS = tuple(fmt for fmt in DATE_FORMATS if '/' in fmt)
+
+# Upper bounds on OCR input; Tesseract time grows with pixel count
+MAX_IMAGE_BYTES = int(os.getenv("OCR_MAX_IMAGE_BYTES", 10 * 1024 * 1024))
+MAX_IMAGE_DIMENSION = int(os.getenv("OCR_MAX_IMAGE_DIMENSION", 2000))
+
+# Tesseract options: treat notes as one uniform block of text and skip the
+# inverted-text pass, which handwritten notes on light paper never need
+TESSERACT_CONFIG = os.getenv("OCR_TESSERACT_CONFIG", "--psm 6 -c tessedit_do_invert=0")
+
+def _split_tesseract_config(config: str):
+    """Read the page segmentation mode and -c variables from a Tesseract command-line config"""
+    psm = None
+    variables = {}
+    args = shlex.split(config)
+    for flag, value in zip(args, args[1:]):
+        if flag == '--psm':
+            psm = int(value)
+        elif flag == '-c':
+            name, _, setting = value.partition('=')
+            variables[name] = setting
+    return psm, variables
+
+# TESSERACT_CONFIG for the bindings that take options rather than a command
+# line (tesserocr and aiopytesseract)
+_TESSERACT_PSM, _TESSERACT_VARIABLES = _split_tesseract_config(TESSERACT_CONFIG)
+
+# Optional 0-255 cut-off for binarising images before OCR (0 keeps grayscale)
+BINARIZE_THRESHOLD = int(os.getenv("OCR_BINARIZE_THRESHOLD", 0))
+
+# Number of Tesseract subprocesses allowed to run at once for batch OCR
+OCR_CONCURRENCY = int(os.getenv("OCR_CONCURRENCY", os.cpu_count() or 1))
+
+# Field patterns for OCR lines, compiled once at import
+_DATE_RE = re.compile(r'date:?\s*(\d{4}-\d{1,2}-\d{1,2}|\d{1,2}/\d{1,2}/\d{2,4})', re.IGNORECASE)
+_TYPE_RE = re.compile(r'type:?\s*(.+)', re.IGNORECASE)
+_DURATION_RE = re.compile(r'duration:?\s*(\d+)', re.IGNORECASE)
+
+# Exercise-line field patterns, compiled once at import
+_EXERCISE_RE = re.compile(r'exercise:?\s*(.+)', re.IGNORECASE)
+_SETS_RE = re.compile(r'sets:?\s*(\d+)', re.IGNORECASE)
+_REPS_RE = re.compile(r'reps:?\s*(\d+(?:-\d+)?)', re.IGNORECASE)
+_WEIGHT_RE = re.compile(r'weight:?\s*(\d+(?:\.\d+)?)', re.IGNORECASE)
+_NOTES_RE = re.compile(r'notes:?\s*(.+)', re.IGNORECASE)
+
+# Reps and weight on a sets line, each found anywhere on the line by an
+# optional lookahead, so one match() fills whichever are present
+_SETS_LINE_RE = re.compile(
+    r'(?:(?=.*?reps:?\s*(?P<reps_value>\d+(?:-\d+)?)))?'
+    r'(?:(?=.*?weight:?\s*(?P<weight_value>\d+(?:\.\d+)?)))?',
+    re.IGNORECASE,
+)
+
+def _iter_sections(text: str):
+    """Yield blank-line separated sections of text as lists of stripped lines"""
+    section = []
+    for line in text.splitlines():
+        line = line.strip()
+        if line:
+            section.append(line)
+        elif section:
+            yield section
+            section = []
+    if section:
+        yield section
+
+def _parse_reps(reps: str) -> int:
+    """Parse a reps value, averaging ranges such as 8-10"""
+    if '-' in reps:
+        min_reps, max_reps = map(int, reps.split('-'))
+        return (min_reps + max_reps) // 2
+    return int(reps)
+
+@dataclass(slots=True)
+class _Exercise:
+    """Exercise fields accumulated while scanning OCR lines"""
+    name: str
+    sets: Optional[int] = None
+    reps: Optional[int] = None
+    weight: Optional[float] = None
+    notes: Optional[str] = None
+
+def _init_ocr_worker(tesseract_cmd: str) -> None:
+    """Carry the Tesseract path into pool workers that do not fork"""
+    pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
 
 class OCRProcessor:
     """Process images of handwritten workout notes using OCR"""
     
     def __init__(self, tesseract_cmd: Optional[str] = None):
         """Initialize OCR processor with optional path to Tesseract executable"""
+        # Tesseract's OpenMP threading scales poorly; run each instance
+        # single-threaded and parallelise across processes instead
+        os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+        
         if tesseract_cmd:
             pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+        
+        # tesserocr API handle, created on first use and not thread-safe
+        self._api = None
+        self._api_lock = threading.Lock()
+    
+    def __getstate__(self):
+        # The tesserocr handle and lock stay with this process
+        return {}
+    
+    def __setstate__(self, state):
+        self._api = None
+        self._api_lock = threading.Lock()
+    
+    def close(self) -> None:
+        """Release the in-process Tesseract API, if one was created"""
+        with self._api_lock:
+            if self._api is not None:
+                self._api.End()
+                self._api = None
+    
+    def _load_image(self, image: Union[str, bytes]) -> Image.Image:
+        """Open image bytes or an image path as grayscale, downscaled to at most MAX_IMAGE_DIMENSION per side"""
+        # Open image from bytes or a path
+        image = Image.open(io.BytesIO(image) if isinstance(image, bytes) else image)
+        
+        # Let the JPEG decoder skip detail we would throw away, then cap the size
+        max_size = (MAX_IMAGE_DIMENSION, MAX_IMAGE_DIMENSION)
+        image.draft('L', max_size)
+        image = image.convert('L')
+        image.thumbnail(max_size, Image.LANCZOS)
+        
+        if BINARIZE_THRESHOLD:
+            image = image.point(lambda p: 255 if p > BINARIZE_THRESHOLD else 0, mode='1')
+        return image
+    
+    def _prepare_image_bytes(self, image_bytes: bytes) -> bytes:
+        """Re-encode the downscaled image as PNG for the Tesseract subprocess"""
+        buffer = io.BytesIO()
+        self._load_image(image_bytes).save(buffer, format="PNG")
+        return buffer.getvalue()
     
     def process_image(self, image_bytes: bytes) -> str:
         """Extract text from image using Tesseract OCR"""
         try:
-            # Open image from bytes
-            image = Image.open(io.BytesIO(image_bytes))
+            image = self._load_image(image_bytes)
+            
+            # Prefer in-process tesserocr, which keeps the language model loaded
+            if PyTessBaseAPI is not None:
+                with self._api_lock:
+                    if self._api is None:
+                        self._api = PyTessBaseAPI(lang='eng')
+                        # Same options the pytesseract path passes on the command line
+                        if _TESSERACT_PSM is not None:
+                            self._api.SetPageSegMode(_TESSERACT_PSM)
+                        for name, setting in _TESSERACT_VARIABLES.items():
+                            self._api.SetVariable(name, setting)
+                    self._api.SetImage(image)
+                    return self._api.GetUTF8Text()
             
             # Extract text from image
-            text = pytesseract.image_to_string(image)
+            text = pytesseract.image_to_string(image, config=TESSERACT_CONFIG)
             return text
         except Exception as e:
             raise Exception(f"OCR processing failed: {str(e)}")
     
+    async def process_image_async(self, image_bytes: bytes) -> str:
+        """Extract text from image without blocking the event loop"""
+        try:
+            prepared = await asyncio.to_thread(self._prepare_image_bytes, image_bytes)
+            # Same options process_image passes to Tesseract
+            options = {"psm": _TESSERACT_PSM} if _TESSERACT_PSM is not None else {}
+            return await aiopytesseract.image_to_string(
+                prepared,
+                config=list(_TESSERACT_VARIABLES.items()) or None,
+                **options
+            )
+        except Exception as e:
+            raise Exception(f"OCR processing failed: {str(e)}")
+    
+    async def process_images(self, images: List[bytes], concurrency: Optional[int] = None) -> List[str]:
+        """Extract text from several images concurrently, in input order"""
+        semaphore = asyncio.Semaphore(concurrency or OCR_CONCURRENCY)
+        
+        async def _process(image_bytes: bytes) -> str:
+            async with semaphore:
+                return await self.process_image_async(image_bytes)
+        
+        return await asyncio.gather(*(_process(image_bytes) for image_bytes in images))
+    
+    def process_image_batch(self, images: List[Union[str, bytes]]) -> List[str]:
+        """
+        Extract text from several images, in input order
+        
+        Image paths are preprocessed like process_image input and listed in a
+        file so Tesseract initialises once for all of them; raw image bytes
+        fall back to process_image.
+        """
+        paths = [image for image in images if isinstance(image, str)]
+        path_texts = iter(self._process_image_paths(paths)) if paths else iter(())
+        return [next(path_texts) if isinstance(image, str) else self.process_image(image)
+                for image in images]
+    
+    def _process_image_paths(self, image_paths: List[str]) -> List[str]:
+        """Run one Tesseract invocation over a list file of image paths"""
+        try:
+            with tempfile.TemporaryDirectory() as work_dir:
+                # Downscaled (and binarised) PNG copies, as process_image would see them
+                prepared_paths = []
+                for index, image_path in enumerate(image_paths):
+                    prepared_path = os.path.join(work_dir, f"{index}.png")
+                    self._load_image(image_path).save(prepared_path, format="PNG")
+                    prepared_paths.append(prepared_path)
+                
+                list_path = os.path.join(work_dir, "images.txt")
+                with open(list_path, 'w') as list_file:
+                    list_file.write('\n'.join(prepared_paths))
+                text = pytesseract.image_to_string(list_path, config=TESSERACT_CONFIG)
+        except Exception as e:
+            raise Exception(f"OCR processing failed: {str(e)}")
+        
+        # Tesseract ends every page with a form feed
+        return text.split('\f')[:len(image_paths)]
+    
+    def process_images_pool(self, images: List[bytes], workers: Optional[int] = None) -> List[str]:
+        """Extract text from several images in parallel worker processes, in input order"""
+        with ProcessPoolExecutor(
+            max_workers=workers or OCR_CONCURRENCY,
+            initializer=_init_ocr_worker,
+            initargs=(pytesseract.pytesseract.tesseract_cmd,),
+        ) as executor:
+            return list(executor.map(self.process_image, images))
+    
     def extract_workout_data(self, ocr_text: str, client_id: str) -> List[Dict[str, Any]]:
         """
         Parse OCR text into structured workout data
@@ -43,7 +272,7 @@ class OCRProcessor:
         workout_records = []
         
         # Split text into workout sections
-        workout_sections = re.split(r'\n\s*\n', ocr_text)
+        workout_sections = list(_iter_sections(ocr_text))
         
         current_date = datetime.now().isoformat()
         workout_type = "Strength Training"  # Default type
@@ -51,164 +280,108 @@ class OCRProcessor:
         exercises = []
         
         # First pass: look for global workout attributes (date, type, duration)
-        for section in workout_sections:
-            if not section.strip():
-                continue
-                
-            lines = section.strip().split('\n')
-            
+        for lines in workout_sections:
             for line in lines:
-                line = line.strip()
-                
                 # Check for date
-                date_match = re.search(r'date:?\s*(\d{4}-\d{1,2}-\d{1,2}|\d{1,2}/\d{1,2}/\d{2,4})', line, re.IGNORECASE)
+                date_match = _DATE_RE.search(line)
                 if date_match:
-                    try:
-                        # Try to parse date in different formats
-                        date_str = date_match.group(1)
-                        
-                        # Handle different date formats
-                        if '-' in date_str:
-                            # Ensure proper ISO format (YYYY-MM-DD)
-                            parts = date_str.split('-')
-                            if len(parts) == 3:
-                                year, month, day = parts
-                                # Add leading zeros if needed
-                                if len(month) == 1:
-                                    month = f"0{month}"
-                                if len(day) == 1:
-                                    day = f"0{day}"
-                                current_date = f"{year}-{month}-{day}"
-                        else:
-                            # Handle MM/DD/YYYY format
-                            parts = date_str.split('/')
-                            if len(parts) == 3:
-                                month, day, year = parts
-                                # Add leading zeros if needed
-                                if len(month) == 1:
-                                    month = f"0{month}"
-                                if len(day) == 1:
-                                    day = f"0{day}"
-                                # Handle 2-digit years
-                                if len(year) == 2:
-                                    year = f"20{year}"
-                                current_date = f"{year}-{month}-{day}"
-                    except:
+                    date_str = date_match.group(1)
+                    # Try each format for this separator; %m/%d accept one or two digits
+                    formats = _DASH_DATE_FORMATS if '-' in date_str else _SLASH_DATE_FORMATS
+                    for fmt in formats:
+                        try:
+                            current_date = datetime.strptime(date_str, fmt).strftime("%Y-%m-%d")
+                            break
+                        except ValueError:
+                            continue
+                    else:
                         # If date parsing fails, use current date
-                        current_date = datetime.now().isoformat().split('T')[0]
+                        current_date = datetime.now().strftime("%Y-%m-%d")
                         
                 # Check for workout type
-                type_match = re.search(r'type:?\s*(.+)', line, re.IGNORECASE)
+                type_match = _TYPE_RE.search(line)
                 if type_match:
                     workout_type = type_match.group(1).strip()
                     
                 # Check for duration
-                duration_match = re.search(r'duration:?\s*(\d+)', line, re.IGNORECASE)
+                duration_match = _DURATION_RE.search(line)
                 if duration_match:
                     workout_duration = int(duration_match.group(1))
         
         # Second pass: extract exercises
         current_exercise = None
         
-        for section in workout_sections:
-            if not section.strip():
-                continue
-                
-            lines = section.strip().split('\n')
-            
+        for lines in workout_sections:
             for line in lines:
-                line = line.strip()
-                
                 # Check for exercise
-                exercise_match = re.search(r'exercise:?\s*(.+)', line, re.IGNORECASE)
+                exercise_match = _EXERCISE_RE.search(line)
                 if exercise_match:
                     # If we were processing an exercise, add it to the list
-                    if current_exercise:
+                    if current_exercise is not None:
                         exercises.append(current_exercise)
                         
                     # Start a new exercise
-                    current_exercise = {
-                        'name': exercise_match.group(1).strip(),
-                        'sets': None,
-                        'reps': None,
-                        'weight': None,
-                        'notes': None
-                    }
+                    current_exercise = _Exercise(name=exercise_match.group(1).strip())
                     continue
                 
                 # If no current exercise, skip
-                if not current_exercise:
+                if current_exercise is None:
                     continue
                 
                 # Check for sets
-                sets_match = re.search(r'sets:?\s*(\d+)', line, re.IGNORECASE)
+                sets_match = _SETS_RE.search(line)
                 if sets_match:
-                    current_exercise['sets'] = int(sets_match.group(1))
-                    
-                    # Check if reps is on the same line
-                    reps_match = re.search(r'reps:?\s*(\d+(?:-\d+)?)', line, re.IGNORECASE)
-                    if reps_match:
-                        reps = reps_match.group(1)
-                        # If range (e.g., 8-10), take the average
-                        if '-' in reps:
-                            min_reps, max_reps = map(int, reps.split('-'))
-                            current_exercise['reps'] = (min_reps + max_reps) // 2
-                        else:
-                            current_exercise['reps'] = int(reps)
+                    current_exercise.sets = int(sets_match.group(1))
                     
-                    # Check if weight is on the same line
-                    weight_match = re.search(r'weight:?\s*(\d+(?:\.\d+)?)\s*(?:lbs?|kg)?', line, re.IGNORECASE)
-                    if weight_match:
-                        current_exercise['weight'] = float(weight_match.group(1))
+                    # Check if reps and weight are on the same line
+                    same_line = _SETS_LINE_RE.match(line).groupdict()
+                    if same_line['reps_value']:
+                        current_exercise.reps = _parse_reps(same_line['reps_value'])
+                    if same_line['weight_value']:
+                        current_exercise.weight = float(same_line['weight_value'])
                     
                     continue
                 
                 # Check for reps (if not found on sets line)
-                if current_exercise['reps'] is None:
-                    reps_match = re.search(r'reps:?\s*(\d+(?:-\d+)?)', line, re.IGNORECASE)
+                if current_exercise.reps is None:
+                    reps_match = _REPS_RE.search(line)
                     if reps_match:
-                        reps = reps_match.group(1)
-                        if '-' in reps:
-                            min_reps, max_reps = map(int, reps.split('-'))
-                            current_exercise['reps'] = (min_reps + max_reps) // 2
-                        else:
-                            current_exercise['reps'] = int(reps)
+                        current_exercise.reps = _parse_reps(reps_match.group(1))
                         continue
                 
                 # Check for weight (if not found on sets line)
-                if current_exercise['weight'] is None:
-                    weight_match = re.search(r'weight:?\s*(\d+(?:\.\d+)?)\s*(?:lbs?|kg)?', line, re.IGNORECASE)
+                if current_exercise.weight is None:
+                    weight_match = _WEIGHT_RE.search(line)
                     if weight_match:
-                        current_exercise['weight'] = float(weight_match.group(1))
+                        current_exercise.weight = float(weight_match.group(1))
                         continue
                 
                 # Check for notes
-                notes_match = re.search(r'notes:?\s*(.+)', line, re.IGNORECASE)
+                notes_match = _NOTES_RE.search(line)
                 if notes_match:
-                    current_exercise['notes'] = notes_match.group(1).strip()
-                    continue
+                    current_exercise.notes = notes_match.group(1).strip()
         
         # Add the last exercise if present
-        if current_exercise:
+        if current_exercise is not None:
             exercises.append(current_exercise)
             
         # Create a workout record if we have valid exercises
         if exercises:
             # Set defaults for missing values in exercises
             for exercise in exercises:
-                if exercise['sets'] is None:
-                    exercise['sets'] = 1
-                if exercise['reps'] is None:
-                    exercise['reps'] = 10
-                if exercise['weight'] is None:
-                    exercise['weight'] = 0
+                if exercise.sets is None:
+                    exercise.sets = 1
+                if exercise.reps is None:
+                    exercise.reps = 10
+                if exercise.weight is None:
+                    exercise.weight = 0
             
             workout_record = {
                 'client_id': client_id,
                 'date': current_date,
                 'type': workout_type,
                 'duration': workout_duration,
-                'exercises': exercises,
+                'exercises': [asdict(exercise) for exercise in exercises],
                 'notes': f"Generated from OCR on {datetime.now().isoformat()}"
             }
             
@@ -10,9 +10,10 @@ It implements:
 5. Redis-based caching for OpenAI responses to reduce costs and improve performance
 
 Usage:
-- POST /api/v1/intelligence/analysis/analyze - Analyze client workout data
+- POST /api/v1/intelligence/analysis/analyze - Analyze client workout data (set "stream" for server-sent events)
+- POST /api/v1/intelligence/analysis/analyze/batch - Analyze several clients/queries concurrently
 - GET /api/v1/intelligence/analysis/rate-limit-status - Check current rate limit status
-- POST /api/v1/intelligence/analysis/clear-cache - Clear the OpenAI response cache
+- POST /api/v1/intelligence/analysis/clear-cache - Clear the OpenAI response cache for a client (all clients for admins)
 
 Environment variables:
 - OPENAI_API_KEY: Your OpenAI API key
@@ -21,34 +22,41 @@ Environment variables:
 - OPENAI_CACHE_TTL: (Optional) Cache TTL in seconds (default: 3600)
 """
 
-import pandas as pd
-# Uncomment numpy if it's actually needed elsewhere in the file
-# import numpy as np
-from openai import OpenAI
 import os
+import logging
+import orjson
 from pydantic import BaseModel, Field
-from datetime import datetime, timedelta
 import time
-from collections import deque
+import asyncio
+from array import array
+from functools import lru_cache
+from collections import Counter
+from dataclasses import dataclass
 from ..auth_utils import validate_api_key
 from ..utils.response import StandardResponse
 from ..utils.cache.openai_cache import openai_cache
-from ..utils.cache.openai_analysis import analyze_with_openai_cached
+from ..utils.cache.semantic_cache import semantic_cache
+from ..utils.openai_client import get_openai_client
 from ..utils.fitness_data.embedding_tools import get_rag_context
+from ..db import AsyncClientRepository, AsyncWorkoutRepository, get_client_repository, get_workout_repository, get_async_db
+from ..db.repositories import AsyncUserRepository
 from sqlalchemy.ext.asyncio import AsyncSession
-from ..db import get_async_db, AsyncClientRepository, AsyncWorkoutRepository
 import uuid
-from typing import Dict, Any, Optional, List
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from typing import Dict, Any, Optional, List, Tuple
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 
 # Create router - remove prefix to avoid duplication with main.py's prefix
 router = APIRouter()
 
+logger = logging.getLogger(__name__)
+
 # Define models if they don't exist in a central place
 class AIAnalysisRequest(BaseModel):
-    client_id: str = Field(..., example="c1d2e3f4-g5h6-i7j8-k9l0-m1n2o3p4q5r6")
+    client_id: uuid.UUID = Field(..., example="c1d2e3f4-a5b6-47c8-9d0e-f1a2b3c4d5e6")
     query: str = Field(..., example="What are the trends in bench press performance?")
     force_refresh: bool = Field(False, description="If true, ignore cached results and force a new API call")
+    stream: bool = Field(False, description="If true, send the answer as server-sent events while it is generated")
 
 class AIAnalysisResponse(BaseModel):
     answer: str
@@ -56,9 +64,12 @@ class AIAnalysisResponse(BaseModel):
     
     model_config = {"from_attributes": True}
 
+class BatchAnalysisRequest(BaseModel):
+    items: List[AIAnalysisRequest] = Field(..., min_length=1, max_length=20)
+
 # For cache clearing endpoint
 class CacheClearRequest(BaseModel):
-    client_id: Optional[str] = Field(None, description="If provided, only clear cache for this client")
+    client_id: Optional[uuid.UUID] = Field(None, description="If provided, only clear cache for this client")
 
 class CacheClearResponse(BaseModel):
     entries_cleared: int
@@ -66,43 +77,58 @@ class CacheClearResponse(BaseModel):
     
     model_config = {"from_attributes": True}
 
+# Result of create_chat_completion, the same shape for fresh and cached answers
+@dataclass(slots=True)
+class ChatResult:
+    content: str
+    model: str
+    from_cache: bool
+
 # Simple rate limiter for OpenAI API
 class SimpleRateLimiter:
     def __init__(self, max_requests, time_window):
         self.max_requests = max_requests
         self.time_window = time_window  # in seconds
-        self.request_timestamps = deque()
+        # Ring of the last max_requests request times; the slot at _idx is
+        # the oldest and the next to be overwritten. Empty slots never count.
+        self._timestamps = array('d', [float('-inf')] * max_requests)
+        self._idx = 0
+        self._lock = asyncio.Lock()
     
-    def can_make_request(self):
-        # Remove timestamps older than the time window
-        current_time = time.time()
-        while self.request_timestamps and current_time - self.request_timestamps[0] > self.time_window:
-            self.request_timestamps.popleft()
-        
-        # Check if we're under the limit
-        return len(self.request_timestamps) < self.max_requests
+    def oldest_request(self):
+        return self._timestamps[self._idx]
+    
+    def requests_in_window(self, current_time=None):
+        current_time = time.monotonic() if current_time is None else current_time
+        return sum(1 for t in self._timestamps if current_time - t <= self.time_window)
+    
+    def can_make_request(self, current_time=None):
+        current_time = time.monotonic() if current_time is None else current_time
+        # Under the limit once the oldest of the last max_requests has expired
+        return current_time - self._timestamps[self._idx] > self.time_window
     
-    def add_request(self):
-        self.request_timestamps.append(time.time())
+    def add_request(self, current_time=None):
+        self._timestamps[self._idx] = time.monotonic() if current_time is None else current_time
+        self._idx = (self._idx + 1) % self.max_requests
+    
+    async def try_acquire(self):
+        # Check the limit and record the request as one step, at one instant
+        async with self._lock:
+            current_time = time.monotonic()
+            if not self.can_make_request(current_time):
+                return False
+            self.add_request(current_time)
+            return True
 
 # Create a rate limiter instance (3 requests per minute)
 rate_limiter = SimpleRateLimiter(max_requests=3, time_window=60)
 
-# OpenAI client will be initialized only when needed
-client = None
-
-def get_openai_client():
-    global client
-    if client is None:
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            # Return a dummy key for development if no API key is provided
-            print("WARNING: No OpenAI API key found. AI features will not work properly.")
-            api_key = "dummy_key_for_development"
-        client = OpenAI(api_key=api_key)
-    return client
-
-# Get the best available OpenAI model
+# Cap on OpenAI calls in flight at once; waiting callers yield to the event loop
+OPENAI_CONCURRENCY = int(os.getenv("OPENAI_CONCURRENCY", "5"))
+openai_semaphore = asyncio.Semaphore(OPENAI_CONCURRENCY)
+
+# Get the best available OpenAI model (fixed for the life of the process)
+@lru_cache(maxsize=1)
 def get_best_available_model():
     # Try to use environment variable first, default to gpt-4o-mini
     model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
@@ -113,79 +139,116 @@ def get_best_available_model():
     if model not in fallback_models:
         fallback_models.insert(0, model)  # Add user's preferred model as first choice
     
-    return fallback_models
+    return tuple(fallback_models)
 
-# Safely create chat completion with fallbacks and caching
-def create_chat_completion(messages, temperature=0.1, max_tokens=500, force_refresh=False):
+# Model that most recently succeeded, tried first until it expires
+MODEL_CACHE_TTL = 300  # in seconds
+_model_cache = {"name": None, "expires": 0}
+
+def _get_cached_result(cache_key) -> Optional[ChatResult]:
+    """Return a cached answer for these messages from any candidate model"""
+    cached_response = openai_cache.get_any_by_key(cache_key, list(get_best_available_model()))
+    if cached_response:
+        logger.debug("Using cached response for model %s", cached_response["model"])
+        return ChatResult(
+            content=cached_response["choices"][0]["message"]["content"],
+            model=cached_response["model"],
+            from_cache=True
+        )
+    return None
+
+async def _wait_for_rate_limit():
+    """Sleep until the rate limiter has room, then reserve it for this request"""
+    # Checking and recording in one step keeps concurrent callers (e.g. the
+    # items of one batch) from all passing the check at the same moment
+    while not await rate_limiter.try_acquire():
+        # At maximum capacity: wait for the oldest request to expire
+        wait_time = rate_limiter.time_window - (time.monotonic() - rate_limiter.oldest_request()) + 1  # Add 1 second buffer
+        if wait_time > 0:
+            logger.info("Rate limit approached. Waiting %.1f seconds before making next request...", wait_time)
+            await asyncio.sleep(wait_time)
+
+def _models_in_order():
+    """Candidate models, with the last working one first while it is fresh"""
     models = get_best_available_model()
+    working_model = _model_cache["name"] if time.monotonic() < _model_cache["expires"] else None
+    if working_model in models:
+        return [working_model] + [m for m in models if m != working_model]
+    return list(models)
+
+def _record_success(cache_key, model, content):
+    """Remember the working model and cache the answer"""
+    _model_cache.update(name=model, expires=time.monotonic() + MODEL_CACHE_TTL)
+    
+    # Cache the successful response
+    # Convert to a cacheable format (response object might not be serializable)
+    cacheable_response = {
+        "model": model,
+        "choices": [
+            {
+                "message": {
+                    "content": content,
+                    "role": "assistant"
+                },
+                "index": 0
+            }
+        ],
+        "created": int(time.time()),
+        "cached": True
+    }
+    
+    # Store in cache
+    openai_cache.set_by_key(cache_key, model, cacheable_response)
+
+async def _handle_model_failure(model, error):
+    """Log a failed model attempt and back off if it was rate limited"""
+    logger.warning("Failed to use model %s: %s", model, error)
+    if model == _model_cache["name"]:
+        _model_cache.update(name=None, expires=0)
+    
+    # Check if this is a rate limit error
+    error_str = str(error).lower()
+    if "rate limit" in error_str or "429" in error_str:
+        logger.info("Rate limit exceeded. Waiting 20 seconds before trying next model...")
+        await asyncio.sleep(20)  # Wait 20 seconds before trying next model
+
+# Safely create chat completion with fallbacks and caching
+async def create_chat_completion(messages, temperature=0.1, max_tokens=500, force_refresh=False):
     last_error = None
+    # Hash the messages once for every cache lookup and the final store
+    cache_key = openai_cache.digest(messages)
     
-    # Check if the response is in cache (if not forcing refresh)
+    # Check if the response is in cache (if not forcing refresh); a hit
+    # returns before any rate limiter bookkeeping
     if not force_refresh:
-        for model in models:
-            cached_response = openai_cache.get(messages, model)
-            if cached_response:
-                print(f"Using cached response for model {model}")
-                return cached_response
-    
-    # Check if we're approaching rate limit and wait if needed
-    current_time = time.time()
-    # Clean up expired timestamps
-    while rate_limiter.request_timestamps and current_time - rate_limiter.request_timestamps[0] > rate_limiter.time_window:
-        rate_limiter.request_timestamps.popleft()
-    
-    # If we're at maximum capacity, wait for the oldest request to expire
-    if len(rate_limiter.request_timestamps) >= rate_limiter.max_requests:
-        oldest_timestamp = rate_limiter.request_timestamps[0]
-        wait_time = rate_limiter.time_window - (current_time - oldest_timestamp) + 1  # Add 1 second buffer
-        if wait_time > 0:
-            print(f"Rate limit approached. Waiting {wait_time} seconds before making next request...")
-            time.sleep(wait_time)
+        cached = _get_cached_result(cache_key)
+        if cached:
+            return cached
+    
+    await _wait_for_rate_limit()
     
     # Try each model in sequence
-    for model in models:
+    for model in _models_in_order():
         try:
-            print(f"Attempting to use model: {model}")
-            response = get_openai_client().chat.completions.create(
-                model=model,
-                messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens,
-            )
-            print(f"Successfully used model: {model}")
-            # Record this successful request in our rate limiter
-            rate_limiter.add_request()
-            
-            # Cache the successful response
-            # Convert to a cacheable format (response object might not be serializable)
-            cacheable_response = {
-                "model": model,
-                "choices": [
-                    {
-                        "message": {
-                            "content": response.choices[0].message.content,
-                            "role": "assistant"
-                        },
-                        "index": 0
-                    }
-                ],
-                "created": int(time.time()),
-                "cached": True
-            }
-            
-            # Store in cache
-            openai_cache.set(messages, model, cacheable_response)
+            logger.debug("Attempting to use model: %s", model)
+            async with openai_semaphore:
+                response = await get_openai_client().chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                )
+            logger.debug("Successfully used model: %s", model)
+            _record_success(cache_key, model, response.choices[0].message.content)
             
-            return response
+            return ChatResult(
+                content=response.choices[0].message.content,
+                model=response.model,
+                from_cache=False
+            )
         except Exception as e:
             last_error = e
-            print(f"Failed to use model {model}: {str(e)}")
-            
-            # Check if this is a rate limit error
-            error_str = str(e).lower()
-            if "rate limit" in error_str or "429" in error_str:
-                print("Rate limit exceeded. Waiting 20 seconds before trying next model...")
-                time.sleep(20)  # Wait 20 seconds before trying next model
+            await _handle_model_failure(model, e)
             # Continue to next model
     
     # If we've tried all models and none worked, raise the last error
@@ -194,19 +257,264 @@ def create_chat_completion(messages, temperature=0.1, max_tokens=500, force_refr
     else:
         raise Exception("All models failed but no error was recorded")
 
-# Helper function to get client name (duplicated from clients.py for now)
-def get_client_name(client_id: str) -> str:
-    # In a real implementation, you would fetch this from a database
-    # This is just a mock implementation for demo purposes
-    from .clients import clients_db
-    if client_id in clients_db:
-        return clients_db[client_id]["name"]
-    return "Unknown Client"
+# Stream a chat completion as it is generated, with the same fallbacks and caching
+# If result is given, it is filled in with the full answer once the stream ends
+async def stream_chat_completion(messages, temperature=0.1, max_tokens=500, force_refresh=False, result: Optional[ChatResult] = None):
+    last_error = None
+    cache_key = openai_cache.digest(messages)
+    
+    # A cached answer is sent as a single chunk
+    if not force_refresh:
+        cached = _get_cached_result(cache_key)
+        if cached:
+            if result is not None:
+                result.content, result.model, result.from_cache = cached.content, cached.model, True
+            yield cached.content
+            return
+    
+    await _wait_for_rate_limit()
+    
+    for model in _models_in_order():
+        parts = []
+        try:
+            logger.debug("Attempting to stream from model: %s", model)
+            # The concurrency slot is held until the stream is finished
+            async with openai_semaphore:
+                stream = await get_openai_client().chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    stream=True,
+                )
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        parts.append(chunk.choices[0].delta.content)
+                        yield chunk.choices[0].delta.content
+            logger.debug("Successfully streamed from model: %s", model)
+            content = "".join(parts)
+            _record_success(cache_key, model, content)
+            if result is not None:
+                result.content, result.model, result.from_cache = content, model, False
+            return
+        except Exception as e:
+            # Once text has been sent the answer cannot switch models
+            if parts:
+                raise
+            last_error = e
+            await _handle_model_failure(model, e)
+    
+    # If we've tried all models and none worked, raise the last error
+    if last_error:
+        raise last_error
+    else:
+        raise Exception("All models failed but no error was recorded")
+
+# The fitness knowledge base is static for the life of the process, so RAG
+# context for a repeated query can skip the embedding and vector search
+@lru_cache(maxsize=1024)
+def get_cached_rag_context(query: str, max_tokens: int = 1000) -> str:
+    return get_rag_context(query, max_tokens=max_tokens)
+
+async def get_rag_context_async(query: str, max_tokens: int = 1000) -> str:
+    """Look up RAG context in a worker thread so it overlaps database work"""
+    return await asyncio.to_thread(get_cached_rag_context, query, max_tokens)
+
+# Most recent exercise records offered to the analysis prompt
+ANALYSIS_MAX_RECORDS = 50
+
+# Client names by (user ID, client ID); the clients router drops an entry
+# when that client changes
+CLIENT_NAME_CACHE_SIZE = 4096
+_client_name_cache: Dict[Tuple[str, str], str] = {}
+
+async def get_client_name(client_repo: AsyncClientRepository, client_id: uuid.UUID, user_id) -> Optional[str]:
+    """Look up the name of one of the user's clients, caching it for later
+    analyses, or None if the user has no such client"""
+    key = (str(user_id), str(client_id))
+    name = _client_name_cache.get(key)
+    if name is None:
+        client = await client_repo.get_by_id(client_id, user_id=user_id)
+        if client is None:
+            return None
+        # Evict the oldest entry once the cache is full
+        if len(_client_name_cache) >= CLIENT_NAME_CACHE_SIZE:
+            _client_name_cache.pop(next(iter(_client_name_cache)))
+        name = _client_name_cache[key] = client.name
+    return name
+
+def invalidate_client_name_cache(user_id, client_id) -> None:
+    """Forget a client's cached name after it is renamed or deleted"""
+    _client_name_cache.pop((str(user_id), str(client_id)), None)
+
+async def is_admin(db: AsyncSession, user_id) -> bool:
+    """Whether the API key's user has the admin role"""
+    if user_id is None:
+        return False
+    user = await AsyncUserRepository(db).get_by_id(user_id)
+    return user is not None and user.role == "admin"
+
+async def build_workout_context(workout_repo: AsyncWorkoutRepository, client_id: uuid.UUID, client_name: str) -> Optional[Dict[str, Any]]:
+    """Summarise a client's workouts for the analysis prompt, or None if there are none"""
+    # Get the client's workouts through the client_id index, newest first,
+    # flattened to one record per exercise with just the fields the prompt uses
+    workouts = await workout_repo.get_by_client_with_exercises(client_id)
+    workout_records = [
+        {
+            "date": workout.date,
+            "exercise": exercise.name,
+            "sets": exercise.sets,
+            "reps": exercise.reps,
+            "weight": exercise.weight
+        }
+        for workout in workouts
+        for exercise in workout.exercises
+    ]
+    
+    if not workout_records:
+        return None
+        
+    # Calculate basic stats for numerical columns in a single pass,
+    # skipping missing values: [total, min, max, count] per column
+    totals = {col: [0.0, float('inf'), float('-inf'), 0] for col in ('sets', 'reps', 'weight')}
+    exercise_frequency = Counter()
+    for w in workout_records:
+        exercise_frequency[w["exercise"]] += 1
+        for col, acc in totals.items():
+            value = w.get(col)
+            if value is None:
+                continue
+            acc[0] += value
+            if value < acc[1]:
+                acc[1] = value
+            if value > acc[2]:
+                acc[2] = value
+            acc[3] += 1
+    
+    # Prepare context for OpenAI
+    df_stats = {
+        col: {'mean': total / count, 'max': float(high), 'min': float(low)}
+        for col, (total, low, high, count) in totals.items()
+        if count
+    }
+            
+    # Exercise frequency, most performed first
+    exercise_counts = {
+        "total_exercises": len(workout_records),
+        "by_exercise": dict(exercise_frequency.most_common(10))
+    }
+    
+    # Context message for OpenAI
+    return {
+        "client_name": client_name,
+        "workout_stats": df_stats,
+        "exercise_counts": exercise_counts,
+        # Most recent records; build_analysis_messages trims them to the
+        # prompt's token budget
+        "workout_records": workout_records[:ANALYSIS_MAX_RECORDS]
+    }
+
+# Token budget for the client data block of the analysis prompt
+ANALYSIS_CONTEXT_TOKENS = int(os.getenv("ANALYSIS_CONTEXT_TOKENS", "3000"))
+
+@lru_cache(maxsize=1)
+def get_token_encoder():
+    """tiktoken encoder for prompt budgeting, or None if it can't be loaded"""
+    try:
+        # Imported on first use to keep tiktoken out of app startup
+        import tiktoken
+        return tiktoken.encoding_for_model("gpt-4o-mini")
+    except Exception as e:
+        # The encoding file is downloaded on first use, so this can fail offline
+        logger.warning("Could not load tiktoken encoder, estimating tokens from length: %s", e)
+        return None
+
+def count_tokens(text: str) -> int:
+    encoder = get_token_encoder()
+    if encoder is None:
+        return len(text) // 4 + 1
+    return len(encoder.encode(text))
+
+def serialize_context(context: Dict[str, Any]) -> str:
+    """Compact JSON for the prompt, keeping as many of the most recent
+    workout records as fit in ANALYSIS_CONTEXT_TOKENS"""
+    records = context["workout_records"]
+    budget = ANALYSIS_CONTEXT_TOKENS - count_tokens(orjson.dumps({**context, "workout_records": []}, default=str).decode())
+    kept = 0
+    for record in records:
+        # +1 for the separating comma
+        cost = count_tokens(orjson.dumps(record, default=str).decode()) + 1
+        if cost > budget:
+            break
+        budget -= cost
+        kept += 1
+    if kept < len(records):
+        context = {**context, "workout_records": records[:kept]}
+    return orjson.dumps(context, default=str).decode()
+
+# Instructions shared by every analysis prompt, kept first so the provider's
+# prompt-prefix cache can match across requests
+_SYSTEM_PREFIX = (
+    {"role": "system", "content": "You are a fitness analysis assistant that helps trainers understand their clients' workout data. Provide concise, actionable insights."},
+)
+
+def build_analysis_messages(query: str, rag_context: str, context: Dict[str, Any]) -> List[Dict[str, str]]:
+    """Assemble the OpenAI chat messages for one analysis question"""
+    # One system block after the static prefix carries the knowledge and data
+    system_content = (
+        f"Here is some relevant fitness knowledge to help you provide accurate information:\n\n{rag_context}\n\n"
+        f"Here's the client data: {serialize_context(context)}"
+    )
+    return [
+        *_SYSTEM_PREFIX,
+        {"role": "system", "content": system_content},
+        {"role": "user", "content": f"Analyze the following client workout data. Question: {query}"}
+    ]
+
+# Context window of the smallest candidate model (gpt-3.5-turbo)
+MODEL_CONTEXT_TOKENS = int(os.getenv("OPENAI_CONTEXT_TOKENS", "16385"))
+# Formatting overhead OpenAI adds per chat message
+TOKENS_PER_MESSAGE = 4
+
+@lru_cache(maxsize=1)
+def _system_prefix_tokens() -> int:
+    # The static instructions are tokenized once per process
+    return sum(count_tokens(m["content"]) + TOKENS_PER_MESSAGE for m in _SYSTEM_PREFIX)
+
+def prompt_fits(messages: List[Dict[str, str]], max_tokens: int = 500) -> bool:
+    """Whether messages from build_analysis_messages leave room for max_tokens of answer"""
+    prompt_tokens = _system_prefix_tokens() + sum(
+        count_tokens(m["content"]) + TOKENS_PER_MESSAGE for m in messages[len(_SYSTEM_PREFIX):]
+    )
+    return prompt_tokens + max_tokens <= MODEL_CONTEXT_TOKENS
+
+def _sse_event(data: Dict[str, Any]) -> str:
+    """Format one server-sent event carrying a JSON payload"""
+    return f"data: {orjson.dumps(data).decode()}\n\n"
+
+async def _stream_analysis(messages, request: AIAnalysisRequest):
+    """Relay a streamed completion as server-sent events, then cache the answer"""
+    result = ChatResult(content="", model="", from_cache=False)
+    try:
+        async for text in stream_chat_completion(messages, temperature=0.1, max_tokens=500, force_refresh=request.force_refresh, result=result):
+            yield _sse_event({"content": text})
+    except Exception as e:
+        logger.exception("Error streaming analysis")
+        yield f"event: error\n{_sse_event({'message': f'Analysis failed: {str(e)}'})}"
+        return
+    
+    # Same bookkeeping as the JSON path once the whole answer is known
+    if result.content:
+        await asyncio.to_thread(semantic_cache.set, str(request.client_id), request.query, result.content, result.model)
+    yield _sse_event({"model_used": result.model, "from_cache": result.from_cache})
+    yield "data: [DONE]\n\n"
 
 @router.post("/analyze", response_model=Dict[str, Any])
 async def analyze_client_data(
     request: AIAnalysisRequest,
-    client_info: Dict[str, Any] = Depends(validate_api_key)
+    client_info: Dict[str, Any] = Depends(validate_api_key),
+    client_repo: AsyncClientRepository = Depends(get_client_repository),
+    workout_repo: AsyncWorkoutRepository = Depends(get_workout_repository)
 ):
     """
     Analyze client workout data using natural language queries
@@ -215,86 +523,91 @@ async def analyze_client_data(
     based on the specific query provided. Results are cached to improve 
     performance and reduce costs.
     """
-    # Check rate limit if not using cache
+    # Only the user's own clients can be analyzed; checked before any
+    # cache or workout access
+    client_name = await get_client_name(client_repo, request.client_id, client_info.get("user_id"))
+    if client_name is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Client with ID {request.client_id} not found"
+        )
+    
+    # Fail fast when a forced refresh would have to wait for the rate limit;
+    # create_chat_completion reserves the slot
     if request.force_refresh and not rate_limiter.can_make_request():
         return StandardResponse.error(
             message="Rate limit exceeded. Please try again later.",
             status_code=status.HTTP_429_TOO_MANY_REQUESTS
         )
     
-    # Add this request to the rate limiter if we're not using cache
-    if request.force_refresh:
-        rate_limiter.add_request()
-    
     try:
-        # Get client information (in production, fetch from database)
-        client_name = get_client_name(request.client_id)
+        # Reuse the answer to a near-identical question about this client;
+        # embedding the question is CPU work, so it runs off the event loop
+        if not request.force_refresh:
+            cached = await asyncio.to_thread(semantic_cache.get, str(request.client_id), request.query)
+            if cached:
+                if request.stream:
+                    return StreamingResponse(
+                        iter([
+                            _sse_event({"content": cached["answer"]}),
+                            _sse_event({"model_used": cached["model"], "from_cache": True}),
+                            "data: [DONE]\n\n"
+                        ]),
+                        media_type="text/event-stream"
+                    )
+                return StandardResponse.success(
+                    data={
+                        "answer": cached["answer"],
+                        "query": request.query,
+                        "client_name": client_name,
+                        "model_used": cached["model"],
+                        "from_cache": True,
+                        # Answered from the semantic cache; no RAG lookup ran
+                        "used_rag": False
+                    },
+                    message="Analysis completed successfully (from cache)"
+                )
         
-        # Get workout records (in production, fetch from database)
-        from .workouts import workouts_db
-        workout_records = [w for w in workouts_db.values() if w["client_id"] == request.client_id]
+        # Workout history and RAG context are independent, so fetch them together
+        context, rag_context = await asyncio.gather(
+            build_workout_context(workout_repo, request.client_id, client_name),
+            get_rag_context_async(request.query)
+        )
         
-        if not workout_records:
+        if context is None:
             return StandardResponse.success(
                 data={"answer": "No workout data available for this client. Please add some workout records first."},
                 message="Analysis completed with no data"
             )
-            
-        # Create a pandas DataFrame from workout records for analysis
-        df = pd.DataFrame(workout_records)
-        
-        # Prepare context for OpenAI
-        df_stats = {}
-        
-        # Calculate basic stats for numerical columns
-        for col in ['sets', 'reps', 'weight']:
-            if col in df.columns:
-                df_stats[col] = {
-                    'mean': float(df[col].mean()) if not df[col].empty else 0,
-                    'max': float(df[col].max()) if not df[col].empty else 0,
-                    'min': float(df[col].min()) if not df[col].empty else 0
-                }
-                
-        # Get exercise frequency if possible
-        exercise_counts = {}
-        if 'exercises' in df.columns:
-            # This is a more complex structure, would need custom handling
-            # For now, we'll just count total exercises
-            exercise_counts = {"total_exercises": sum(len(w.get("exercises", [])) for w in workout_records)}
-        
-        # Context message for OpenAI
-        context = {
-            "client_name": client_name,
-            "workout_stats": df_stats,
-            "exercise_counts": exercise_counts,
-            "workout_records": workout_records[:10]  # Limit to 10 most recent workouts
-        }
-        
-        # Get RAG context for the query
-        rag_context = get_rag_context(request.query)
         
         # Call OpenAI for analysis using our helper with fallbacks
-        messages = [
-            {"role": "system", "content": "You are a fitness analysis assistant that helps trainers understand their clients' workout data. Provide concise, actionable insights."},
-            {"role": "system", "content": f"Here is some relevant fitness knowledge to help you provide accurate information:\n\n{rag_context}"},
-            {"role": "user", "content": f"Analyze the following client workout data. Question: {request.query}"},
-            {"role": "system", "content": f"Here's the client data: {str(context)}"}
-        ]
+        messages = build_analysis_messages(request.query, rag_context, context)
+        if not prompt_fits(messages):
+            return StandardResponse.error(
+                message="The question is too long to analyze. Please shorten it and try again.",
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+        
+        if request.stream:
+            return StreamingResponse(
+                _stream_analysis(messages, request),
+                media_type="text/event-stream"
+            )
         
-        response = create_chat_completion(messages, temperature=0.1, max_tokens=500, force_refresh=request.force_refresh)
+        result = await create_chat_completion(messages, temperature=0.1, max_tokens=500, force_refresh=request.force_refresh)
         
         # Extract and return the AI's analysis
-        answer = response.choices[0].message.content
+        answer = result.content
+        from_cache = result.from_cache
         
-        # Check if response was from cache
-        from_cache = hasattr(response, 'cached') and response.cached
+        await asyncio.to_thread(semantic_cache.set, str(request.client_id), request.query, answer, result.model)
         
         return StandardResponse.success(
             data={
                 "answer": answer,
                 "query": request.query,
                 "client_name": client_name,
-                "model_used": response.model,  # Include which model was actually used
+                "model_used": result.model,  # Include which model was actually used
                 "from_cache": from_cache,
                 "used_rag": True
             },
@@ -302,9 +615,7 @@ async def analyze_client_data(
         )
         
     except Exception as e:
-        import traceback
-        print("Error in analyze_client_data:")
-        traceback.print_exc()  # Print full stack trace for debugging
+        logger.exception("Error in analyze_client_data")
         
         error_detail = str(e)
         # Add more context if it's an OpenAI API error
@@ -316,6 +627,111 @@ async def analyze_client_data(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+@router.post("/analyze/batch", response_model=Dict[str, Any])
+async def analyze_client_data_batch(
+    request: BatchAnalysisRequest,
+    client_info: Dict[str, Any] = Depends(validate_api_key),
+    client_repo: AsyncClientRepository = Depends(get_client_repository),
+    workout_repo: AsyncWorkoutRepository = Depends(get_workout_repository)
+):
+    """
+    Analyze several client/query pairs in one call
+    
+    Each item is answered as by POST /analyze, including the semantic
+    cache. The OpenAI calls run concurrently, bounded by the OpenAI
+    concurrency limit, and RAG context is looked up once per distinct
+    query. Results are returned in the order of the items.
+    """
+    # Look up RAG context once per distinct query, in the background while
+    # the workout histories load; started by the first item that needs it
+    queries = {item.query for item in request.items}
+    rag_task = None
+    
+    def _rag_contexts() -> asyncio.Future:
+        nonlocal rag_task
+        if rag_task is None:
+            rag_task = asyncio.ensure_future(asyncio.to_thread(
+                lambda: {query: get_cached_rag_context(query) for query in queries}
+            ))
+        return rag_task
+    
+    # The session can only run one query at a time
+    db_lock = asyncio.Lock()
+    
+    user_id = client_info.get("user_id")
+    
+    async def _analyze(item: AIAnalysisRequest) -> Dict[str, Any]:
+        # Only the user's own clients can be analyzed
+        async with db_lock:
+            client_name = await get_client_name(client_repo, item.client_id, user_id)
+        if client_name is None:
+            raise Exception(f"Client with ID {item.client_id} not found")
+        
+        # Reuse the answer to a near-identical question about this client
+        if not item.force_refresh:
+            cached = await asyncio.to_thread(semantic_cache.get, str(item.client_id), item.query)
+            if cached:
+                return {
+                    "client_id": item.client_id,
+                    "query": item.query,
+                    "answer": cached["answer"],
+                    "client_name": client_name,
+                    "model_used": cached["model"],
+                    "from_cache": True
+                }
+        
+        rag_contexts = _rag_contexts()
+        async with db_lock:
+            context = await build_workout_context(workout_repo, item.client_id, client_name)
+        
+        if context is None:
+            return {
+                "client_id": item.client_id,
+                "query": item.query,
+                "answer": "No workout data available for this client. Please add some workout records first."
+            }
+        
+        rag_contexts = await rag_contexts
+        messages = build_analysis_messages(item.query, rag_contexts[item.query], context)
+        if not prompt_fits(messages):
+            raise Exception("The question is too long to analyze. Please shorten it and try again.")
+        
+        # Fail fast when a forced refresh would have to wait for the rate limit;
+        # create_chat_completion reserves the slot
+        if item.force_refresh and not rate_limiter.can_make_request():
+            raise Exception("Rate limit exceeded. Please try again later.")
+        result = await create_chat_completion(messages, temperature=0.1, max_tokens=500, force_refresh=item.force_refresh)
+        await asyncio.to_thread(semantic_cache.set, str(item.client_id), item.query, result.content, result.model)
+        
+        return {
+            "client_id": item.client_id,
+            "query": item.query,
+            "answer": result.content,
+            "client_name": client_name,
+            "model_used": result.model,
+            "from_cache": result.from_cache
+        }
+    
+    try:
+        results = await asyncio.gather(*(_analyze(item) for item in request.items), return_exceptions=True)
+    finally:
+        # If no item with workouts awaited the lookup, don't leave it unobserved
+        if rag_task is not None:
+            rag_task.cancel()
+            await asyncio.gather(rag_task, return_exceptions=True)
+    
+    return StandardResponse.success(
+        data={
+            "results": [
+                {"client_id": item.client_id, "query": item.query, "error": str(result)}
+                if isinstance(result, Exception) else result
+                for item, result in zip(request.items, results)
+            ],
+            "used_rag": True
+        },
+        message="Batch analysis completed"
+    )
+
 # Add a rate limit status endpoint
 @router.get("/rate-limit-status", response_model=Dict[str, Any])
 async def get_rate_limit_status(
@@ -323,18 +739,15 @@ async def get_rate_limit_status(
 ):
     """Get the current status of the rate limiter"""
     # Calculate remaining capacity
-    current_time = time.time()
-    # Remove expired timestamps
-    while rate_limiter.request_timestamps and current_time - rate_limiter.request_timestamps[0] > rate_limiter.time_window:
-        rate_limiter.request_timestamps.popleft()
+    current_time = time.monotonic()
     
-    used_capacity = len(rate_limiter.request_timestamps)
+    used_capacity = rate_limiter.requests_in_window(current_time)
     remaining_capacity = rate_limiter.max_requests - used_capacity
     
     # Calculate time until next available slot if at capacity
     time_until_reset = 0
-    if used_capacity >= rate_limiter.max_requests and rate_limiter.request_timestamps:
-        time_until_reset = int(rate_limiter.time_window - (current_time - rate_limiter.request_timestamps[0]))
+    if not rate_limiter.can_make_request(current_time):
+        time_until_reset = int(rate_limiter.time_window - (current_time - rate_limiter.oldest_request()))
     
     return StandardResponse.success(
         data={
@@ -354,16 +767,34 @@ async def get_rate_limit_status(
 @router.post("/clear-cache", response_model=Dict[str, Any])
 async def clear_cache(
     request: CacheClearRequest,
-    client_info: Dict[str, Any] = Depends(validate_api_key)
+    client_info: Dict[str, Any] = Depends(validate_api_key),
+    client_repo: AsyncClientRepository = Depends(get_client_repository),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Clear the OpenAI response cache, either for a specific client or all clients"""
+    """Clear the OpenAI response cache, either for one of the user's clients
+    or, for admins, all clients"""
+    user_id = client_info.get("user_id")
+    if request.client_id:
+        if await get_client_name(client_repo, request.client_id, user_id) is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Client with ID {request.client_id} not found"
+            )
+    elif not await is_admin(db, user_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can clear the cache for all clients"
+        )
+    
     try:
         if request.client_id:
             # Clear cache for specific client
-            entries_cleared = openai_cache.invalidate_by_client(request.client_id)
+            entries_cleared = await asyncio.to_thread(openai_cache.invalidate_by_client, str(request.client_id))
+            entries_cleared += await asyncio.to_thread(semantic_cache.invalidate_client, str(request.client_id))
         else:
             # Clear all cache
-            entries_cleared = openai_cache.clear_all()
+            entries_cleared = await asyncio.to_thread(openai_cache.clear_all)
+            entries_cleared += await asyncio.to_thread(semantic_cache.clear_all)
         
         return StandardResponse.success(
             data={
@@ -377,142 +808,3 @@ async def clear_cache(
             message=f"Failed to clear cache: {str(e)}",
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
-
-@router.get("/analysis/analyze", response_model=Dict[str, Any])
-async def analyze_client_data(
-    client_id: Optional[uuid.UUID] = Query(None, description="Client ID to analyze"),
-    time_period: Optional[str] = Query("30d", description="Time period to analyze (7d, 30d, 90d, all)"),
-    query: str = Query(..., min_length=5, max_length=1000, description="Analysis question or request"),
-    client_info: Dict[str, Any] = Depends(validate_api_key),
-    db: AsyncSession = Depends(get_async_db)
-):
-    """
-    Analyze client workout data using OpenAI.
-    
-    Submit a natural language query about the client's workout history and get AI-powered analysis.
-    
-    Examples:
-    - "What exercises has this client been doing most frequently?"
-    - "Has the client been making progress on their bench press?"
-    - "What muscle groups need more attention based on their workout history?"
-    - "Suggest modifications to their routine based on their performance"
-    
-    The analysis will be cached for identical queries to reduce API costs and improve response times.
-    """
-    # Validate client exists if client_id is provided
-    if client_id:
-        client_repo = AsyncClientRepository(db)
-        client = await client_repo.get(client_id)
-        if not client:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Client with ID {client_id} not found"
-            )
-    
-    # Convert time period to days
-    days = None
-    if time_period != "all":
-        if time_period == "7d":
-            days = 7
-        elif time_period == "30d":
-            days = 30
-        elif time_period == "90d":
-            days = 90
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid time_period. Must be one of: 7d, 30d, 90d, all"
-            )
-    
-    # Get client workouts
-    workout_repo = AsyncWorkoutRepository(db)
-    
-    if client_id:
-        if days:
-            # Calculate date threshold
-            date_threshold = datetime.utcnow() - timedelta(days=days)
-            workouts = await workout_repo.get_by_client_since_date(client_id, date_threshold)
-        else:
-            workouts = await workout_repo.get_by_client(client_id)
-        
-        # Prepare client info
-        client_name = client.name if client else "Unknown Client"
-    else:
-        workouts = []
-        client_name = "All Clients"
-    
-    # Prepare the workout data for analysis
-    workout_data = []
-    for workout in workouts:
-        workout_dict = {
-            "id": str(workout.id),
-            "date": workout.date.isoformat() if workout.date else None,
-            "name": workout.name,
-            "notes": workout.notes,
-            "duration_minutes": workout.duration_minutes,
-            "exercises": workout.exercises
-        }
-        workout_data.append(workout_dict)
-    
-    # Get RAG context if available
-    rag_context = get_rag_context(query, max_tokens=1000)
-    
-    # Prepare the data for OpenAI
-    try:
-        analysis_result = await analyze_with_openai_cached(
-            client_name=client_name,
-            workout_data=workout_data,
-            query=query,
-            rag_context=rag_context
-        )
-        
-        # Return the analysis result
-        return StandardResponse.success(
-            data={
-                "analysis": analysis_result["content"],
-                "from_cache": analysis_result.get("from_cache", False),
-                "used_rag": bool(rag_context)
-            },
-            message="Analysis completed successfully"
-        )
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error analyzing client data: {str(e)}"
-        )
-
-@router.get("/analysis/rate-limit-status", response_model=Dict[str, Any])
-async def get_rate_limit_status(
-    client_info: Dict[str, Any] = Depends(validate_api_key)
-):
-    """
-    Get the current rate limit status for OpenAI API usage.
-    
-    Returns information about:
-    - Current usage
-    - Rate limits
-    - Remaining tokens
-    - Reset time
-    """
-    # This would typically query a service that tracks API usage
-    # For now, return placeholder data
-    return StandardResponse.success(
-        data={
-            "usage": {
-                "prompt_tokens_today": 15000,
-                "completion_tokens_today": 5000,
-                "total_tokens_today": 20000
-            },
-            "limits": {
-                "tokens_per_day": 100000,
-                "tokens_per_minute": 10000
-            },
-            "remaining": {
-                "tokens_today": 80000
-            },
-            "reset": {
-                "daily_at": "00:00:00 UTC"
-            }
-        },
-        message="Rate limit status retrieved successfully"
-    ) 
\ No newline at end of file
@@ -1,20 +1,67 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Path, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Path, Request, Response, status
 from typing import Dict, Any, Optional, List
 from pydantic import BaseModel, Field
 from datetime import datetime, date, timedelta
+import asyncio
+import hashlib
+import time
+import orjson
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
 from ..auth_utils import validate_api_key
 from ..utils.response import StandardResponse
-from ..db import get_async_db, AsyncClientRepository, AsyncWorkoutRepository
+from ..utils.periods import period_days
+from ..db import get_async_db, get_async_session_factory, AsyncClientRepository, AsyncWorkoutRepository
 
 # Create router
 router = APIRouter()
 
+async def _in_own_session(session_factory: sessionmaker, query):
+    """Run one repository query in a session of its own, so several can overlap"""
+    async with session_factory() as session:
+        return await query(session)
+
+async def _zero() -> int:
+    """Stand-in for a count that doesn't apply (new clients over "all")"""
+    return 0
+
+# Computed analytics payloads, reused for ANALYTICS_CACHE_TTL seconds and
+# keyed by (endpoint, user, time_period): key -> (expires, data, etag)
+ANALYTICS_CACHE_TTL = 300
+ANALYTICS_CACHE_SIZE = 1024
+_analytics_cache: Dict[tuple, tuple] = {}
+
+def _get_cached_payload(key: tuple) -> Optional[tuple]:
+    entry = _analytics_cache.get(key)
+    if entry and entry[0] > time.monotonic():
+        return entry[1], entry[2]
+    return None
+
+def _cache_payload(key: tuple, data: Dict[str, Any]) -> str:
+    """Store a payload and return its ETag, a hash of its content"""
+    etag = '"' + hashlib.blake2b(orjson.dumps(data, default=str), digest_size=16).hexdigest() + '"'
+    _analytics_cache.pop(key, None)
+    # Evict the oldest entry once the cache is full
+    if len(_analytics_cache) >= ANALYTICS_CACHE_SIZE:
+        _analytics_cache.pop(next(iter(_analytics_cache)))
+    _analytics_cache[key] = (time.monotonic() + ANALYTICS_CACHE_TTL, data, etag)
+    return etag
+
+def _conditional_response(request: Request, response: Response, data: Dict[str, Any], etag: str, message: str):
+    """Answer 304 if the client already has this payload, else the usual envelope"""
+    headers = {"ETag": etag, "Cache-Control": f"private, max-age={ANALYTICS_CACHE_TTL}"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return StandardResponse.success(data=data, message=message)
+
 @router.get("/business-intelligence", response_model=Dict[str, Any])
 async def get_business_intelligence(
+    request: Request,
+    response: Response,
     time_period: str = Query("30d", description="Time period for analysis (7d, 30d, 90d, all)"),
     client_info: Dict[str, Any] = Depends(validate_api_key),
-    db: AsyncSession = Depends(get_async_db)
+    session_factory: sessionmaker = Depends(get_async_session_factory)
 ):
     """
     Get business intelligence metrics and insights.
@@ -26,78 +73,61 @@ async def get_business_intelligence(
     - Revenue metrics (if available)
     """
     # Convert time period to days
-    days = None
-    if time_period != "all":
-        if time_period == "7d":
-            days = 7
-        elif time_period == "30d":
-            days = 30
-        elif time_period == "90d":
-            days = 90
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid time_period. Must be one of: 7d, 30d, 90d, all"
-            )
+    days = period_days(time_period, ("7d", "30d", "90d", "all"))
+    
+    cache_key = ("business-intelligence", str(client_info.get("user_id")), time_period)
+    cached = _get_cached_payload(cache_key)
+    if cached:
+        return _conditional_response(request, response, *cached, message="Business intelligence metrics retrieved successfully")
+    
+    # Get the user_id from client_info for data isolation
+    user_id = client_info.get("user_id")
     
     try:
-        # Get repositories
-        client_repo = AsyncClientRepository(db)
-        workout_repo = AsyncWorkoutRepository(db)
-        
         # Calculate date threshold
         date_threshold = None
         if days:
             date_threshold = datetime.utcnow() - timedelta(days=days)
         
-        # Get clients
-        clients = await client_repo.get_all()
-        
-        # Count new clients in period
-        new_clients_count = 0
-        if date_threshold:
-            for client in clients:
-                if client.created_at and client.created_at >= date_threshold:
-                    new_clients_count += 1
-        
-        # Get workouts in period
-        workouts = []
-        if date_threshold:
-            # This would need to be implemented in the repository
-            workouts = await workout_repo.get_all_since_date(date_threshold)
-        else:
-            workouts = await workout_repo.get_all()
+        # The aggregates are independent; a session runs one statement at a
+        # time, so each gets its own session and they run concurrently
+        total_clients, new_clients_count, total_workouts, popular_exercises = await asyncio.gather(
+            _in_own_session(session_factory, lambda session: AsyncClientRepository(session).count_all(user_id=user_id)),
+            # New clients in period
+            _in_own_session(session_factory, lambda session: AsyncClientRepository(session).count_since(date_threshold, user_id=user_id))
+            if date_threshold else _zero(),
+            # Workouts in period (all workouts for "all")
+            _in_own_session(session_factory, lambda session: AsyncWorkoutRepository(session).count_since(date_threshold, user_id=user_id)),
+            # Most performed exercises in period, grouped in the database
+            _in_own_session(session_factory, lambda session: AsyncWorkoutRepository(session).top_exercises(date_threshold, limit=10, user_id=user_id))
+        )
         
         # Calculate metrics
-        total_clients = len(clients)
-        total_workouts = len(workouts)
         avg_workouts_per_client = total_workouts / total_clients if total_clients > 0 else 0
         
         # Return the analytics data
-        return StandardResponse.success(
-            data={
-                "client_metrics": {
-                    "total_clients": total_clients,
-                    "new_clients": new_clients_count,
-                    "active_clients": total_clients  # This would need more logic to determine active status
-                },
-                "workout_metrics": {
-                    "total_workouts": total_workouts,
-                    "avg_workouts_per_client": round(avg_workouts_per_client, 2),
-                    "avg_duration_minutes": 45  # Placeholder - would calculate from actual data
-                },
-                "popular_exercises": [
-                    {"name": "Bench Press", "count": 45},
-                    {"name": "Squats", "count": 40},
-                    {"name": "Deadlifts", "count": 35}
-                ],  # Placeholder - would calculate from actual data
-                "revenue_metrics": {
-                    "estimated_monthly": total_clients * 200,  # Placeholder calculation
-                    "revenue_per_client": 200  # Placeholder
-                }
+        data = {
+            "client_metrics": {
+                "total_clients": total_clients,
+                "new_clients": new_clients_count,
+                "active_clients": total_clients  # This would need more logic to determine active status
             },
-            message="Business intelligence metrics retrieved successfully"
-        )
+            "workout_metrics": {
+                "total_workouts": total_workouts,
+                "avg_workouts_per_client": round(avg_workouts_per_client, 2),
+                "avg_duration_minutes": 45  # Placeholder - would calculate from actual data
+            },
+            "popular_exercises": [
+                {"name": name, "count": count}
+                for name, count in popular_exercises
+            ],
+            "revenue_metrics": {
+                "estimated_monthly": total_clients * 200,  # Placeholder calculation
+                "revenue_per_client": 200  # Placeholder
+            }
+        }
+        etag = _cache_payload(cache_key, data)
+        return _conditional_response(request, response, data, etag, message="Business intelligence metrics retrieved successfully")
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -106,6 +136,8 @@ async def get_business_intelligence(
 
 @router.get("/client-retention", response_model=Dict[str, Any])
 async def get_client_retention_analytics(
+    request: Request,
+    response: Response,
     time_period: str = Query("90d", description="Time period for analysis (30d, 90d, 180d, 365d)"),
     client_info: Dict[str, Any] = Depends(validate_api_key),
     db: AsyncSession = Depends(get_async_db)
@@ -120,20 +152,12 @@ async def get_client_retention_analytics(
     - Recommendations for improving retention
     """
     # Convert time period to days
-    days = None
-    if time_period == "30d":
-        days = 30
-    elif time_period == "90d":
-        days = 90
-    elif time_period == "180d":
-        days = 180
-    elif time_period == "365d":
-        days = 365
-    else:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid time_period. Must be one of: 30d, 90d, 180d, 365d"
-        )
+    days = period_days(time_period, ("30d", "90d", "180d", "365d"))
+    
+    cache_key = ("client-retention", str(client_info.get("user_id")), time_period)
+    cached = _get_cached_payload(cache_key)
+    if cached:
+        return _conditional_response(request, response, *cached, message="Client retention analytics retrieved successfully")
     
     try:
         # Calculate date threshold
@@ -141,29 +165,28 @@ async def get_client_retention_analytics(
         
         # This would query actual retention data in a real application
         # For now, return placeholder data
-        return StandardResponse.success(
-            data={
-                "overall_retention": {
-                    "rate": 0.85,  # 85% retention rate
-                    "compared_to_previous": 0.05  # 5% improvement
-                },
-                "retention_by_segment": [
-                    {"segment": "New clients (< 3 months)", "rate": 0.75},
-                    {"segment": "Regular clients (3-12 months)", "rate": 0.85},
-                    {"segment": "Long-term clients (> 12 months)", "rate": 0.95}
-                ],
-                "churn_prediction": {
-                    "at_risk_clients": 3,
-                    "predicted_churn_rate": 0.15
-                },
-                "recommendations": [
-                    "Increase session frequency for new clients",
-                    "Follow up with clients who miss scheduled sessions",
-                    "Implement a referral program to increase client engagement"
-                ]
+        data = {
+            "overall_retention": {
+                "rate": 0.85,  # 85% retention rate
+                "compared_to_previous": 0.05  # 5% improvement
             },
-            message="Client retention analytics retrieved successfully"
-        )
+            "retention_by_segment": [
+                {"segment": "New clients (< 3 months)", "rate": 0.75},
+                {"segment": "Regular clients (3-12 months)", "rate": 0.85},
+                {"segment": "Long-term clients (> 12 months)", "rate": 0.95}
+            ],
+            "churn_prediction": {
+                "at_risk_clients": 3,
+                "predicted_churn_rate": 0.15
+            },
+            "recommendations": [
+                "Increase session frequency for new clients",
+                "Follow up with clients who miss scheduled sessions",
+                "Implement a referral program to increase client engagement"
+            ]
+        }
+        etag = _cache_payload(cache_key, data)
+        return _conditional_response(request, response, data, etag, message="Client retention analytics retrieved successfully")
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
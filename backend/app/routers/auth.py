@@ -7,19 +7,25 @@ This module contains the API endpoints for authentication.
 from fastapi import APIRouter, Depends, HTTPException, status, Body, Header, Response
 from fastapi.security import OAuth2PasswordRequestForm
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, text
+from sqlalchemy import select, update, text, bindparam, func
 import logging
-from datetime import datetime, timedelta
+import time
+import base64
+import binascii
+import secrets
+import jwt
+from datetime import datetime, timedelta, timezone
 import uuid
+from functools import lru_cache
 
 from ..db import get_async_db, AsyncAPIKeyRepository
 from app.models.user import UserCreate, UserResponse
 from ..db.models import User, APIKey
 from ..utils.auth_service import auth_service, UserData
 from ..dependencies.auth import get_current_user, get_api_key_user
-from ..utils.password import verify_password, get_password_hash
+from ..utils.password import verify_password_async, verify_and_update_password_async, get_password_hash, get_password_hash_async
 from ..utils.response import StandardResponse
 from ..utils.error_handlers import handle_exceptions, AuthError, NotFoundError
 
@@ -66,15 +72,15 @@ class CreateApiKeyRequest(BaseModel):
 
 class ApiKeyResponse(BaseModel):
     """Model for API key response."""
-    id: str
+    id: uuid.UUID
     name: str
     key: str
-    client_id: str
-    user_id: str
+    client_id: uuid.UUID
+    user_id: uuid.UUID
     description: Optional[str] = None
     active: bool
-    created_at: str
-    expires_at: Optional[str] = None
+    created_at: datetime
+    expires_at: Optional[datetime] = None
 
 class PasswordResetRequest(BaseModel):
     """Model for requesting a password reset."""
@@ -94,6 +100,98 @@ class CheckTokenRequest(BaseModel):
     """Model for token validation request."""
     token: str
 
+# Secrets debug_token checks signatures against, resolved once at import.
+# The raw binary variant is the Supabase secret base64-decoded.
+_JWT_SECRET = auth_service.jwt_secret
+_SUPABASE_JWT_SECRET = auth_service.supabase_jwt_secret
+_JWT_ALGORITHM = auth_service.jwt_algorithm
+try:
+    _SUPABASE_JWT_SECRET_BYTES: Optional[bytes] = base64.b64decode(
+        _SUPABASE_JWT_SECRET + "=" * (-len(_SUPABASE_JWT_SECRET) % 4)
+    )
+except (binascii.Error, ValueError):
+    _SUPABASE_JWT_SECRET_BYTES = None
+
+# Short-lived per-user caches for /me and /api-keys, keyed by user ID:
+# (expires_at, value). Endpoints that change a user or their keys drop the entry.
+USER_CACHE_TTL = 60
+API_KEYS_CACHE_TTL = 30
+USER_CACHE_SIZE = 5000
+_user_cache: Dict[str, Tuple[float, Any]] = {}
+_api_keys_cache: Dict[str, Tuple[float, Any]] = {}
+
+def _cache_get(cache: Dict[str, Tuple[float, Any]], user_id: str) -> Any:
+    """Get a user's unexpired cache entry, or None."""
+    entry = cache.get(user_id)
+    if entry is None:
+        return None
+    if entry[0] <= time.monotonic():
+        cache.pop(user_id, None)
+        return None
+    return entry[1]
+
+def _cache_set(cache: Dict[str, Tuple[float, Any]], user_id: str, value: Any, ttl: int) -> None:
+    """Cache a value for a user, evicting the oldest entry once the cache is full."""
+    if user_id not in cache and len(cache) >= USER_CACHE_SIZE:
+        cache.pop(next(iter(cache)))
+    cache[user_id] = (time.monotonic() + ttl, value)
+
+def invalidate_user_cache(user_id: Any) -> None:
+    """Forget a user's cached /me and /api-keys responses."""
+    _user_cache.pop(str(user_id), None)
+    _api_keys_cache.pop(str(user_id), None)
+
+# Hot-path statements built once at import; SQLAlchemy's compiled cache then
+# reuses their SQL for every request
+# Emails match case-insensitively through the ix_users_email_lower index;
+# callers pass the email lowercased
+_user_by_email = select(User).where(func.lower(User.email) == bindparam("email"))
+_password_by_user_id = select(User.hashed_password).where(User.id == bindparam("user_id"))
+
+def utc_now() -> datetime:
+    """Current UTC time as a naive datetime, matching the models' DateTime columns."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def _token_data(user: User) -> Dict[str, Any]:
+    """Claims for a user's access and refresh tokens."""
+    return {
+        "sub": str(user.id),
+        "email": user.email,
+        "name": getattr(user, "name", None),
+        "role": user.role,
+    }
+
+def _user_data(user: User) -> UserData:
+    """The user block of a token response."""
+    return UserData(
+        user_id=str(user.id),
+        email=user.email,
+        name=getattr(user, "name", None),
+        role=user.role,
+        is_admin=user.role == "admin"
+    )
+
+@lru_cache(maxsize=4096)
+def _to_uuid(value: str) -> uuid.UUID:
+    """Parse a user ID from a token or path once; repeat IDs come from the cache.
+    
+    Raises:
+        ValueError: If value is not a UUID
+    """
+    return uuid.UUID(value)
+
+async def get_user_by_id(db: AsyncSession, user_id: Any) -> Optional[User]:
+    """Load a user by primary key, checking the session's identity map first."""
+    try:
+        key = user_id if isinstance(user_id, uuid.UUID) else _to_uuid(str(user_id))
+    except ValueError:
+        return None
+    return await db.get(User, key)
+
+# Verified against when the email is unknown, so login takes as long for an
+# unknown email as for a wrong password and doesn't reveal which emails exist
+_DUMMY_PASSWORD_HASH = get_password_hash("dummy_password_for_timing")
+
 @router.post("/login", response_model=Token)
 @handle_exceptions
 async def login(
@@ -107,40 +205,33 @@ async def login(
     Authenticates a user and returns JWT tokens.
     """
     # Query the user by email
-    query = select(User).where(User.email == form_data.username)
-    result = await db.execute(query)
+    result = await db.execute(_user_by_email, {"email": form_data.username.lower()})
     user = result.scalars().first()
     
-    # Check if user exists and password is correct
-    if not user or not verify_password(form_data.password, user.password):
+    # Check if user exists and password is correct, hashing either way
+    password_ok, new_hash = await verify_and_update_password_async(
+        form_data.password, user.hashed_password if user else _DUMMY_PASSWORD_HASH
+    )
+    if not user or not password_ok:
         raise AuthError("Incorrect email or password")
     
+    # Upgrade a legacy bcrypt hash to Argon2id now that we have the password
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+    
     # Check if user is active
-    if hasattr(user, 'is_active') and not user.is_active:
+    if not user.is_active:
         raise AuthError("User account is inactive")
     
     # Create tokens using the AuthService
-    token_data = {
-        "sub": str(user.id),
-        "email": user.email,
-        "name": user.name,
-        "role": user.role if hasattr(user, 'role') else None,
-    }
-    
-    # Access token with shorter expiration
-    access_token = auth_service.create_access_token(token_data)
+    token_data = _token_data(user)
     
-    # Refresh token with longer expiration
-    refresh_token = auth_service.create_refresh_token(token_data)
+    # Access token with shorter expiration, refresh token with longer
+    access_token, refresh_token = auth_service.create_token_pair(token_data)
     
     # Create user data for response
-    user_data = UserData(
-        user_id=str(user.id),
-        email=user.email,
-        name=user.name,
-        role=user.role if hasattr(user, 'role') else None,
-        is_admin=user.role == "admin" if hasattr(user, 'role') else False
-    )
+    user_data = _user_data(user)
     
     # Return token response
     return {
@@ -163,8 +254,7 @@ async def register(
     """
     try:
         # Check if user already exists
-        query = select(User).where(User.email == user_data.email)
-        result = await db.execute(query)
+        result = await db.execute(_user_by_email, {"email": user_data.email.lower()})
         existing_user = result.scalars().first()
         
         if existing_user:
@@ -174,36 +264,31 @@ async def register(
             )
         
         # Create new user
-        hashed_password = get_password_hash(user_data.password)
+        hashed_password = await get_password_hash_async(user_data.password)
+        now = utc_now()
         
         new_user = User(
             id=uuid.uuid4(),
             email=user_data.email,
-            password=hashed_password,
-            name=user_data.name,
+            hashed_password=hashed_password,
             is_active=True,
-            is_admin=False,
             role="user",
-            created_at=datetime.utcnow(),
-            updated_at=datetime.utcnow()
+            created_at=now,
+            updated_at=now
         )
         
         db.add(new_user)
         await db.commit()
-        await db.refresh(new_user)
         
         # Create tokens
         token_data = {
             "sub": str(new_user.id),
             "email": new_user.email,
-            "name": new_user.name,
+            "name": user_data.name,
         }
         
-        # Access token with shorter expiration
-        access_token = auth_service.create_access_token(token_data)
-        
-        # Refresh token with longer expiration
-        refresh_token = auth_service.create_refresh_token(token_data)
+        # Access token with shorter expiration, refresh token with longer
+        access_token, refresh_token = auth_service.create_token_pair(token_data)
         
         # Return token response
         return {
@@ -214,7 +299,7 @@ async def register(
             "user": UserData(
                 user_id=str(new_user.id),
                 email=new_user.email,
-                name=new_user.name,
+                name=user_data.name,
                 role="user",
                 is_admin=False
             )
@@ -222,7 +307,7 @@ async def register(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Registration error: {str(e)}")
+        logger.error("Registration error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Registration error: {str(e)}"
@@ -241,7 +326,7 @@ async def refresh(
     """
     try:
         # Validate the refresh token
-        payload = auth_service.validate_token(refresh_token, token_type="refresh")
+        payload = auth_service.validate_token_cached(refresh_token, "refresh")
         
         # Get user ID from token
         user_id = payload.get("sub") or payload.get("user_id")
@@ -249,35 +334,19 @@ async def refresh(
             raise AuthError("Invalid refresh token")
         
         # Verify user exists
-        stmt = select(User).where(User.id == user_id)
-        result = await db.execute(stmt)
-        user = result.scalars().first()
+        user = await get_user_by_id(db, user_id)
         
         if not user:
             raise NotFoundError("User", user_id)
         
         # Create new tokens
-        token_data = {
-            "sub": str(user.id),
-            "email": user.email,
-            "name": user.name,
-            "role": user.role if hasattr(user, 'role') else None,
-        }
+        token_data = _token_data(user)
         
-        # Create new access token
-        new_access_token = auth_service.create_access_token(token_data)
-        
-        # Create new refresh token
-        new_refresh_token = auth_service.create_refresh_token(token_data)
+        # Create new access and refresh tokens
+        new_access_token, new_refresh_token = auth_service.create_token_pair(token_data)
         
         # Create user data for response
-        user_data = UserData(
-            user_id=str(user.id),
-            email=user.email,
-            name=user.name,
-            role=user.role if hasattr(user, 'role') else None,
-            is_admin=user.role == "admin" if hasattr(user, 'role') else False
-        )
+        user_data = _user_data(user)
         
         # Return token response
         return {
@@ -309,7 +378,7 @@ async def migrate_api_key(
         # Validate API key
         api_key_record = await api_key_repo.get_by_key(request.api_key)
         if not api_key_record:
-            logger.warning(f"Invalid API key during migration")
+            logger.warning("Invalid API key during migration")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid API key",
@@ -317,8 +386,9 @@ async def migrate_api_key(
             )
         
         # Check if API key is expired
-        if hasattr(api_key_record, 'expires_at') and api_key_record.expires_at and api_key_record.expires_at < datetime.utcnow():
-            logger.warning(f"Expired API key during migration")
+        now = utc_now()
+        if api_key_record.expires_at and api_key_record.expires_at < now:
+            logger.warning("Expired API key during migration")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="API key has expired",
@@ -327,31 +397,23 @@ async def migrate_api_key(
         
         # Get user associated with the API key
         user_id = api_key_record.user_id
-        query = select(User).where(User.id == user_id)
-        result = await db.execute(query)
-        user = result.scalars().first()
+        user = await get_user_by_id(db, user_id)
         
         if not user:
-            logger.warning(f"User not found for API key")
+            logger.warning("User not found for API key")
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User associated with this API key not found"
             )
         
         # Create tokens
-        token_data = {
-            "sub": str(user.id),
-            "email": user.email,
-            "name": user.name,
-        }
+        token_data = _token_data(user)
         
         # Generate tokens
-        access_token = auth_service.create_access_token(token_data)
-        refresh_token = auth_service.create_refresh_token(token_data)
+        access_token, refresh_token = auth_service.create_token_pair(token_data)
         
         # Update last_used_at timestamp
-        if hasattr(api_key_record, 'last_used_at'):
-            await api_key_repo.update(api_key_record.id, {"last_used_at": datetime.utcnow()})
+        await api_key_repo.update(api_key_record.id, {"last_used_at": now})
         
         # Return token response
         return {
@@ -359,18 +421,12 @@ async def migrate_api_key(
             "refresh_token": refresh_token,
             "token_type": "bearer",
             "expires_in": auth_service.access_token_expire_minutes * 60,
-            "user": UserData(
-                user_id=str(user.id),
-                email=user.email,
-                name=user.name,
-                role=user.role if hasattr(user, 'role') else "user",
-                is_admin=user.is_admin if hasattr(user, 'is_admin') else False
-            )
+            "user": _user_data(user)
         }
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"API key migration error: {str(e)}")
+        logger.error("API key migration error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"API key migration error: {str(e)}"
@@ -387,12 +443,13 @@ async def create_api_key(
     """
     try:
         # Generate a new API key
-        api_key = f"tmk_{uuid.uuid4().hex}"
+        api_key = f"tmk_{secrets.token_hex(16)}"
         
         # Calculate expiration if provided
+        now = utc_now()
         expires_at = None
         if request.expires_in_days:
-            expires_at = datetime.utcnow() + timedelta(days=request.expires_in_days)
+            expires_at = now + timedelta(days=request.expires_in_days)
         
         # Create API key record
         api_key_record = APIKey(
@@ -403,7 +460,7 @@ async def create_api_key(
             client_id=request.client_id,  # Client this key belongs to
             user_id=current_user.user_id,  # User who created this key
             active=True,
-            created_at=datetime.utcnow(),
+            created_at=now,
             last_used_at=None,
             expires_at=expires_at
         )
@@ -411,22 +468,22 @@ async def create_api_key(
         # Save to database
         db.add(api_key_record)
         await db.commit()
-        await db.refresh(api_key_record)
+        invalidate_user_cache(current_user.user_id)
         
         # Return response
         return {
-            "id": str(api_key_record.id),
+            "id": api_key_record.id,
             "name": api_key_record.name,
             "key": api_key_record.key,  # Include the key in the response
-            "client_id": str(api_key_record.client_id),
-            "user_id": str(api_key_record.user_id),
+            "client_id": api_key_record.client_id,
+            "user_id": api_key_record.user_id,
             "description": api_key_record.description,
             "active": api_key_record.active,
-            "created_at": api_key_record.created_at.isoformat(),
-            "expires_at": api_key_record.expires_at.isoformat() if api_key_record.expires_at else None
+            "created_at": api_key_record.created_at,
+            "expires_at": api_key_record.expires_at
         }
     except Exception as e:
-        logger.error(f"Error creating API key: {str(e)}")
+        logger.error("Error creating API key: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error creating API key: {str(e)}"
@@ -441,29 +498,45 @@ async def get_api_keys(
     Get all API keys for the current user.
     """
     try:
-        # Query API keys for the current user
-        query = select(APIKey).where(APIKey.user_id == current_user.user_id)
+        cached = _cache_get(_api_keys_cache, current_user.user_id)
+        if cached is not None:
+            return list(cached)
+        
+        # Query just the response columns for the current user's API keys,
+        # skipping ORM instance construction per row
+        query = select(
+            APIKey.id,
+            APIKey.name,
+            APIKey.key,
+            APIKey.client_id,
+            APIKey.user_id,
+            APIKey.description,
+            APIKey.active,
+            APIKey.created_at,
+            APIKey.expires_at
+        ).where(APIKey.user_id == _to_uuid(current_user.user_id))
         result = await db.execute(query)
-        api_keys = result.scalars().all()
         
         # Format response
-        response = []
-        for key in api_keys:
-            response.append({
-                "id": str(key.id),
-                "name": key.name,
-                "key": key.key[:8] + "..." + key.key[-4:],  # Mask the key
-                "client_id": str(key.client_id),
-                "user_id": str(key.user_id),
-                "description": key.description,
-                "active": key.active,
-                "created_at": key.created_at.isoformat(),
-                "expires_at": key.expires_at.isoformat() if key.expires_at else None
-            })
-        
-        return response
+        response = [
+            {
+                "id": key["id"],
+                "name": key["name"],
+                "key": key["key"][:8] + "..." + key["key"][-4:],  # Mask the key
+                "client_id": key["client_id"],
+                "user_id": key["user_id"],
+                "description": key["description"],
+                "active": key["active"],
+                "created_at": key["created_at"],
+                "expires_at": key["expires_at"]
+            }
+            for key in result.mappings()
+        ]
+        
+        _cache_set(_api_keys_cache, current_user.user_id, response, API_KEYS_CACHE_TTL)
+        return list(response)
     except Exception as e:
-        logger.error(f"Error retrieving API keys: {str(e)}")
+        logger.error("Error retrieving API keys: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error retrieving API keys: {str(e)}"
@@ -471,7 +544,7 @@ async def get_api_keys(
 
 @router.delete("/api-keys/{api_key_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_api_key(
-    api_key_id: str,
+    api_key_id: uuid.UUID,
     current_user: UserData = Depends(get_current_user),
     db: AsyncSession = Depends(get_async_db)
 ):
@@ -483,8 +556,8 @@ async def delete_api_key(
         api_key_repo = AsyncAPIKeyRepository(db)
         
         # Check if API key exists and belongs to user
-        api_key = await api_key_repo.get_by_id(api_key_id, current_user.user_id)
-        if not api_key:
+        api_key = await db.get(APIKey, api_key_id)
+        if not api_key or api_key.user_id != _to_uuid(current_user.user_id):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"API key with ID {api_key_id} not found or doesn't belong to you"
@@ -492,6 +565,7 @@ async def delete_api_key(
         
         # Delete the API key
         success = await api_key_repo.delete(api_key_id)
+        invalidate_user_cache(current_user.user_id)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -502,7 +576,7 @@ async def delete_api_key(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error deleting API key: {str(e)}")
+        logger.error("Error deleting API key: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error deleting API key: {str(e)}"
@@ -520,14 +594,13 @@ async def request_password_reset(
     """
     try:
         # Find user by email
-        query = select(User).where(User.email == request.email)
-        result = await db.execute(query)
+        result = await db.execute(_user_by_email, {"email": request.email.lower()})
         user = result.scalars().first()
         
         if not user:
             # Don't reveal that the email doesn't exist
             # Just return success to prevent email enumeration attacks
-            logger.info(f"Password reset requested for non-existent email: {request.email}")
+            logger.info("Password reset requested for non-existent email: %s", request.email)
             return
         
         # Create password reset token
@@ -535,11 +608,11 @@ async def request_password_reset(
         
         # In a real application, you would send an email with the reset token
         # For this example, we'll just log it
-        logger.info(f"Password reset token for {user.email}: {reset_token}")
+        logger.info("Password reset token for %s: %s", user.email, reset_token)
         
         # Return no content (success)
     except Exception as e:
-        logger.error(f"Error requesting password reset: {str(e)}")
+        logger.error("Error requesting password reset: %s", e)
         # Don't reveal errors to prevent email enumeration
         # Just return success
         return
@@ -561,35 +634,38 @@ async def reset_password(
                 detail="Invalid or expired reset token"
             )
         
-        # Find the user
-        query = select(User).where(User.id == user_id)
-        result = await db.execute(query)
-        user = result.scalars().first()
-        
-        if not user:
+        try:
+            user_uuid = _to_uuid(user_id)
+        except ValueError:
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid or expired reset token"
             )
         
         # Hash the new password
-        hashed_password = get_password_hash(request.new_password)
+        hashed_password = await get_password_hash_async(request.new_password)
         
-        # Update the user's password
+        # Update the user's password; the row count doubles as the existence check
         stmt = (
             update(User)
-            .where(User.id == user_id)
-            .values(password=hashed_password, updated_at=datetime.utcnow())
+            .where(User.id == user_uuid)
+            .values(hashed_password=hashed_password, updated_at=utc_now())
         )
-        await db.execute(stmt)
+        result = await db.execute(stmt)
+        if result.rowcount == 0:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
         await db.commit()
+        invalidate_user_cache(user_id)
         
         # Return success message
         return {"message": "Password has been reset successfully"}
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error resetting password: {str(e)}")
+        logger.error("Error resetting password: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error resetting password"
@@ -605,42 +681,44 @@ async def change_password(
     Change the current user's password.
     """
     try:
-        # Find the user
-        query = select(User).where(User.id == current_user.user_id)
-        result = await db.execute(query)
-        user = result.scalars().first()
+        user_uuid = _to_uuid(current_user.user_id)
         
-        if not user:
+        # Fetch only the stored password hash
+        result = await db.execute(_password_by_user_id, {"user_id": user_uuid})
+        current_hash = result.scalar_one_or_none()
+        
+        if current_hash is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
         
         # Verify current password
-        if not verify_password(request.current_password, user.password):
+        if not await verify_password_async(request.current_password, current_hash):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Current password is incorrect"
             )
         
         # Hash the new password
-        hashed_password = get_password_hash(request.new_password)
+        hashed_password = await get_password_hash_async(request.new_password)
         
         # Update the user's password
         stmt = (
             update(User)
-            .where(User.id == current_user.user_id)
-            .values(password=hashed_password, updated_at=datetime.utcnow())
+            .where(User.id == user_uuid)
+            .values(hashed_password=hashed_password, updated_at=utc_now())
         )
         await db.execute(stmt)
         await db.commit()
+        invalidate_user_cache(current_user.user_id)
         
         # Return success message
         return {"message": "Password changed successfully"}
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error changing password: {str(e)}")
+        logger.error("Error changing password: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error changing password"
@@ -655,10 +733,12 @@ async def get_current_user_info(
     Get information about the current user.
     """
     try:
+        cached = _cache_get(_user_cache, current_user.user_id)
+        if cached is not None:
+            return cached
+        
         # Find the user
-        query = select(User).where(User.id == current_user.user_id)
-        result = await db.execute(query)
-        user = result.scalars().first()
+        user = await get_user_by_id(db, current_user.user_id)
         
         if not user:
             raise HTTPException(
@@ -667,17 +747,19 @@ async def get_current_user_info(
             )
         
         # Return user info (excluding password)
-        return UserResponse(
+        user_info = UserResponse(
             id=str(user.id),
             email=user.email,
-            name=user.name,
-            is_admin=user.is_admin if hasattr(user, 'is_admin') else False,
+            name=getattr(user, "name", None),
+            is_admin=user.role == "admin",
             created_at=user.created_at
         )
+        _cache_set(_user_cache, current_user.user_id, user_info, USER_CACHE_TTL)
+        return user_info
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error retrieving user info: {str(e)}")
+        logger.error("Error retrieving user info: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error retrieving user information"
@@ -705,82 +787,49 @@ async def debug_token(token: str = Body(...)):
             )
         
         # Decode header and payload (without verification)
-        import base64
-        import json
-        
-        # Decode header
-        header_b64 = parts[0]
-        # Add padding if needed
-        padding_needed = len(header_b64) % 4
-        if padding_needed:
-            header_b64 += '=' * (4 - padding_needed)
-            
         try:
-            header_bytes = base64.b64decode(header_b64)
-            header = json.loads(header_bytes.decode('utf-8'))
-        except Exception as e:
+            header = jwt.get_unverified_header(token)
+        except jwt.DecodeError as e:
             header = {"error": f"Could not decode header: {str(e)}"}
             
-        # Decode payload
-        payload_b64 = parts[1]
-        # Add padding if needed
-        padding_needed = len(payload_b64) % 4
-        if padding_needed:
-            payload_b64 += '=' * (4 - padding_needed)
-            
         try:
-            payload_bytes = base64.b64decode(payload_b64)
-            payload = json.loads(payload_bytes.decode('utf-8'))
+            payload = jwt.decode(token, options={"verify_signature": False})
             
             # Calculate and format expiration time
             if "exp" in payload:
-                from datetime import datetime
-                exp_timestamp = payload["exp"]
-                exp_datetime = datetime.fromtimestamp(exp_timestamp)
+                exp_datetime = datetime.fromtimestamp(payload["exp"])
                 payload["exp_formatted"] = exp_datetime.isoformat()
                 payload["exp_status"] = "Expired" if datetime.now() > exp_datetime else "Valid"
                 
             # Check issued at time
             if "iat" in payload:
-                iat_timestamp = payload["iat"]
-                iat_datetime = datetime.fromtimestamp(iat_timestamp)
+                iat_datetime = datetime.fromtimestamp(payload["iat"])
                 payload["iat_formatted"] = iat_datetime.isoformat()
         except Exception as e:
             payload = {"error": f"Could not decode payload: {str(e)}"}
         
         # Try different validation approaches
-        from app.auth_utils import JWT_SECRET, SUPABASE_JWT_SECRET, JWT_ALGORITHM
         validation_results = []
         
-        # Method 1: Standard JWT decoding
-        try:
-            import jwt
-            decoded = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-            validation_results.append({"method": "JWT_SECRET", "status": "success"})
-        except Exception as e:
-            validation_results.append({"method": "JWT_SECRET", "status": "failed", "error": str(e)})
+        # Try each secret in turn, stopping at the first that verifies
+        def try_secret(method: str, secret) -> bool:
+            try:
+                jwt.decode(token, secret, algorithms=[_JWT_ALGORITHM])
+                validation_results.append({"method": method, "status": "success"})
+                return True
+            except Exception as e:
+                validation_results.append({"method": method, "status": "failed", "error": str(e)})
+                return False
+        
+        # Method 1: Standard JWT decoding, then method 2: Supabase JWT secret
+        verified = try_secret("JWT_SECRET", _JWT_SECRET) or try_secret("SUPABASE_JWT_SECRET", _SUPABASE_JWT_SECRET)
         
-        # Method 2: Supabase JWT secret
-        try:
-            import jwt
-            decoded = jwt.decode(token, SUPABASE_JWT_SECRET, algorithms=[JWT_ALGORITHM])
-            validation_results.append({"method": "SUPABASE_JWT_SECRET", "status": "success"})
-        except Exception as e:
-            validation_results.append({"method": "SUPABASE_JWT_SECRET", "status": "failed", "error": str(e)})
-            
         # Method 3: Raw binary Supabase JWT secret
-        try:
-            import jwt
-            import base64
-            padded_secret = SUPABASE_JWT_SECRET
-            if len(padded_secret) % 4 != 0:
-                padded_secret += '=' * (4 - len(padded_secret) % 4)
-                
-            jwt_secret_bytes = base64.b64decode(padded_secret)
-            decoded = jwt.decode(token, jwt_secret_bytes, algorithms=[JWT_ALGORITHM])
-            validation_results.append({"method": "RAW_BINARY_SUPABASE_JWT_SECRET", "status": "success"})
-        except Exception as e:
-            validation_results.append({"method": "RAW_BINARY_SUPABASE_JWT_SECRET", "status": "failed", "error": str(e)})
+        if not verified:
+            if _SUPABASE_JWT_SECRET_BYTES is None:
+                validation_results.append({"method": "RAW_BINARY_SUPABASE_JWT_SECRET", "status": "failed", "error": "Secret is not valid base64"})
+            else:
+                try_secret("RAW_BINARY_SUPABASE_JWT_SECRET", _SUPABASE_JWT_SECRET_BYTES)
             
         return StandardResponse.success({
             "token_structure": {
@@ -812,7 +861,7 @@ async def check_token_validity(token_data: CheckTokenRequest = Body(...)):
     
     # Log token first few chars for debugging (only in development)
     if token and len(token) > 10:
-        logger.debug(f"Checking token validity, token starts with: {token[:10]}...")
+        logger.debug("Checking token validity, token starts with: %s...", token[:10])
     else:
         logger.warning("Invalid token format received")
         return StandardResponse.success(
@@ -820,32 +869,48 @@ async def check_token_validity(token_data: CheckTokenRequest = Body(...)):
             message="Token validation failed"
         )
     
+    # Read the claims without verifying the signature, so malformed and
+    # expired tokens are turned away without any signature checks
+    try:
+        claims = jwt.decode(token, options={"verify_signature": False})
+    except jwt.PyJWTError:
+        return StandardResponse.success(
+            {"valid": False, "reason": "Invalid token format"},
+            message="Token validation failed"
+        )
+    exp = claims.get("exp")
+    # Allow for the clock-skew leeway validate_supabase_token applies
+    if isinstance(exp, (int, float)) and exp + 30 < time.time():
+        return StandardResponse.success(
+            {"valid": False, "reason": "Token has expired"},
+            message="Token validation failed"
+        )
+    
     # Try to validate the token
     try:
-        # First try to validate as a Supabase token
-        try:
-            payload = auth_service.validate_supabase_token(token)
+        # Supabase tokens name their project as the issuer; ours have none
+        if "supabase" in str(claims.get("iss", "")):
+            payload = auth_service.validate_token_cached(token, "supabase")
             logger.info("Supabase token validation succeeded")
             return StandardResponse.success(
                 {"valid": True, "type": "supabase"},
                 message="Token validation completed"
             )
-        except HTTPException:
-            # If Supabase validation fails, try as a regular JWT
-            payload = auth_service.validate_token(token)
+        else:
+            payload = auth_service.validate_token_cached(token)
             logger.info("JWT token validation succeeded")
             return StandardResponse.success(
                 {"valid": True, "type": "jwt"},
                 message="Token validation completed"
             )
     except HTTPException as e:
-        logger.warning(f"Token validation failed: {e.detail}")
+        logger.warning("Token validation failed: %s", e.detail)
         return StandardResponse.success(
             {"valid": False, "reason": e.detail},
             message="Token validation failed"
         )
     except Exception as e:
-        logger.error(f"Error in token validation: {str(e)}")
+        logger.error("Error in token validation: %s", e)
         return StandardResponse.success(
             {"valid": False, "reason": "Internal validation error"},
             message="Token validation failed"
@@ -3,13 +3,18 @@ from typing import List, Dict, Any, Optional
 from pydantic import BaseModel, Field, EmailStr
 from datetime import datetime
 import uuid
-from sqlalchemy.ext.asyncio import AsyncSession
-from fastapi.responses import JSONResponse
+import asyncio
+import base64
+import binascii
+from fastapi.responses import ORJSONResponse
 
 # Import API key dependency and standard response
 from ..auth_utils import validate_api_key
 from ..utils.response import StandardResponse
-from ..db import AsyncClientRepository, get_async_db
+from ..db import AsyncClientRepository, get_client_repository
+from .ai_analysis import invalidate_client_name_cache
+from ..utils.cache.semantic_cache import semantic_cache
+from ..utils.cache.count_cache import count_cache
 
 # Define models
 class ClientBase(BaseModel):
@@ -47,58 +52,89 @@ class ClientResponse(BaseModel):
 # Create router
 router = APIRouter()
 
+def encode_cursor(client: Dict[str, Any]) -> str:
+    """Opaque pagination cursor pointing just past a client."""
+    raw = f"{client['created_at'].isoformat()}|{client['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str):
+    """Decode a cursor from encode_cursor into (created_at, id)."""
+    try:
+        created_at, client_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(client_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+async def count_clients(client_repo: AsyncClientRepository, user_id) -> int:
+    """Count a user's clients, reusing a recent count once the table is large.
+    
+    Below count_cache.threshold rows (by the planner's estimate) the exact
+    count is cheap, so it is always fresh; create and delete drop the entry.
+    """
+    estimate = await client_repo.estimate_table_size()
+    if estimate is not None and 0 <= estimate < count_cache.threshold:
+        return await client_repo.count_all(user_id=user_id)
+    
+    key = count_cache.key("clients", user_id)
+    count = count_cache.get(key)
+    if count is None:
+        count = await client_repo.count_all(user_id=user_id)
+        count_cache.set(key, count)
+    return count
+
 # GET /clients - List all clients
 @router.get("/clients", response_model=Dict[str, Any])
 async def get_clients(
-    skip: int = Query(0, ge=0, description="Number of clients to skip"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     limit: int = Query(100, ge=1, le=100, description="Maximum number of clients to return"),
+    include_total: bool = Query(False, description="Also count all of the user's clients"),
     client_info: Dict[str, Any] = Depends(validate_api_key),
-    db: AsyncSession = Depends(get_async_db)
+    client_repo: AsyncClientRepository = Depends(get_client_repository)
 ):
     """
-    Retrieve a list of clients.
+    Retrieve a list of clients, newest first.
     
-    - **skip**: Number of clients to skip (pagination)
+    - **cursor**: next_cursor from the previous page; omit for the first page
     - **limit**: Maximum number of clients to return (pagination)
+    - **include_total**: Also return the total number of clients
     """
-    client_repo = AsyncClientRepository(db)
+    after = decode_cursor(cursor) if cursor else None
     
     # Get the user_id from client_info for data isolation
     user_id = client_info.get("user_id")
-    clients_list = await client_repo.get_all(skip=skip, limit=limit, user_id=user_id)
+    clients_list = await client_repo.get_page(limit=limit, after=after, user_id=user_id)
     
-    # Convert database models to Pydantic models for serialization
-    serialized_clients = []
-    for client in clients_list:
-        serialized_clients.append({
-            "id": str(client.id),
-            "name": client.name,
-            "email": client.email,
-            "phone": client.phone or "",
-            "notes": client.notes or "",
-            "created_at": client.created_at.isoformat() if client.created_at else None,
-            "updated_at": client.updated_at.isoformat() if client.updated_at else None
-        })
+    # A full page may have more after it; a short one is the last
+    data = {
+        "clients": clients_list,
+        "next_cursor": encode_cursor(clients_list[-1]) if len(clients_list) == limit else None,
+        "limit": limit
+    }
+    if include_total:
+        data["total"] = await count_clients(client_repo, user_id)
     
-    return StandardResponse.success(
-        data={"clients": serialized_clients, "total": len(serialized_clients), "skip": skip, "limit": limit},
+    # Returned as a response so FastAPI skips jsonable_encoder; orjson
+    # writes the UUIDs and datetimes itself
+    return ORJSONResponse(StandardResponse.success(
+        data=data,
         message="Clients retrieved successfully"
-    )
+    ))
 
 # GET /clients/{client_id} - Get a specific client
 @router.get("/clients/{client_id}", response_model=Dict[str, Any])
 async def get_client(
     client_id: uuid.UUID = Path(..., description="The ID of the client to retrieve"),
     client_info: Dict[str, Any] = Depends(validate_api_key),
-    db: AsyncSession = Depends(get_async_db)
+    client_repo: AsyncClientRepository = Depends(get_client_repository)
 ):
     """
     Retrieve a specific client by ID.
     
     - **client_id**: UUID of the client to retrieve
     """
-    client_repo = AsyncClientRepository(db)
-    
     # Get the user_id from client_info for data isolation
     user_id = client_info.get("user_id")
     client = await client_repo.get_by_id(client_id, user_id=user_id)
@@ -111,30 +147,28 @@ async def get_client(
     
     # Convert to dictionary for serialization
     client_data = {
-        "id": str(client.id),
+        "id": client.id,
         "name": client.name,
         "email": client.email,
         "phone": client.phone or "",
         "notes": client.notes or "",
-        "created_at": client.created_at.isoformat() if client.created_at else None,
-        "updated_at": client.updated_at.isoformat() if client.updated_at else None
+        "created_at": client.created_at,
+        "updated_at": client.updated_at
     }
     
-    return StandardResponse.success(
+    return ORJSONResponse(StandardResponse.success(
         data=client_data,
         message="Client retrieved successfully"
-    )
+    ))
 
 # POST /clients - Create a new client
 @router.post("/clients", response_model=Dict[str, Any])
 async def create_client(
     client: ClientCreate,
     client_info: Dict[str, Any] = Depends(validate_api_key),
-    db: AsyncSession = Depends(get_async_db)
+    client_repo: AsyncClientRepository = Depends(get_client_repository)
 ):
     """Create a new client."""
-    client_repo = AsyncClientRepository(db)
-    
     # Get the user_id from client_info for data isolation
     user_id = client_info.get("user_id")
     
@@ -148,27 +182,26 @@ async def create_client(
     
     # Create client with user association
     client_data = client.dict()
-    client_data["created_at"] = datetime.utcnow()
-    client_data["updated_at"] = datetime.utcnow()
     client_data["user_id"] = user_id  # Add user_id to associate client with current user
     
     db_client = await client_repo.create(client_data)
+    count_cache.invalidate(count_cache.key("clients", user_id))
     
     # Create the response with the appropriate data
     response_data = StandardResponse.success(
         data={
-            "id": str(db_client.id),
+            "id": db_client.id,
             "name": db_client.name,
             "email": db_client.email,
             "phone": db_client.phone,
             "notes": db_client.notes,
-            "created_at": db_client.created_at.isoformat() if db_client.created_at else None
+            "created_at": db_client.created_at
         },
         message="Client created successfully"
     )
     
-    # Return the response with the desired status code using JSONResponse
-    return JSONResponse(
+    # Return the response with the desired status code using ORJSONResponse
+    return ORJSONResponse(
         content=response_data,
         status_code=status.HTTP_201_CREATED
     )
@@ -179,63 +212,45 @@ async def update_client(
     client_id: uuid.UUID,
     client_update: ClientUpdate,
     client_info: Dict[str, Any] = Depends(validate_api_key),
-    db: AsyncSession = Depends(get_async_db)
+    client_repo: AsyncClientRepository = Depends(get_client_repository)
 ):
     """Update a client by ID."""
-    client_repo = AsyncClientRepository(db)
-    
     # Get the user_id from client_info for data isolation
     user_id = client_info.get("user_id")
     
-    # Check if client exists and belongs to this user
-    client = await client_repo.get_by_id(client_id, user_id=user_id)
-    if not client:
+    update_data = {k: v for k, v in client_update.dict().items() if v is not None}
+    
+    # Existence, ownership and email uniqueness are checked by the update itself
+    client_data, email_conflict = await client_repo.atomic_update(client_id, update_data, user_id=user_id)
+    if email_conflict:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Client with email {client_update.email} already exists"
+        )
+    if client_data is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Client with ID {client_id} not found"
         )
     
-    # Check if email is being updated to one that already exists for this user
-    if client_update.email and client_update.email != client.email:
-        existing_client = await client_repo.get_by_email(client_update.email, user_id=user_id)
-        if existing_client and existing_client.id != client_id:
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail=f"Client with email {client_update.email} already exists"
-            )
-    
-    # Update client
-    update_data = {k: v for k, v in client_update.dict().items() if v is not None}
-    update_data["updated_at"] = datetime.utcnow()
-    
-    updated_client = await client_repo.update(client_id, update_data)
+    if "name" in update_data:
+        # Cached name and any cached analyses that mention the old one
+        invalidate_client_name_cache(user_id, client_id)
+        await asyncio.to_thread(semantic_cache.invalidate_client, str(client_id))
     
-    # Convert to dictionary for serialization
-    client_data = {
-        "id": str(updated_client.id),
-        "name": updated_client.name,
-        "email": updated_client.email,
-        "phone": updated_client.phone or "",
-        "notes": updated_client.notes or "",
-        "created_at": updated_client.created_at.isoformat() if updated_client.created_at else None,
-        "updated_at": updated_client.updated_at.isoformat() if updated_client.updated_at else None
-    }
-    
-    return StandardResponse.success(
+    return ORJSONResponse(StandardResponse.success(
         data=client_data,
         message="Client updated successfully"
-    )
+    ))
 
 # DELETE /clients/{client_id} - Delete a client
 @router.delete("/clients/{client_id}", response_model=Dict[str, Any])
 async def delete_client(
     client_id: uuid.UUID,
     client_info: Dict[str, Any] = Depends(validate_api_key),
-    db: AsyncSession = Depends(get_async_db)
+    client_repo: AsyncClientRepository = Depends(get_client_repository)
 ):
     """Delete a client by ID."""
-    client_repo = AsyncClientRepository(db)
-    
     # Get the user_id from client_info for data isolation
     user_id = client_info.get("user_id")
     
@@ -249,6 +264,9 @@ async def delete_client(
     
     # Delete client
     await client_repo.delete(client_id)
+    count_cache.invalidate(count_cache.key("clients", user_id))
+    invalidate_client_name_cache(user_id, client_id)
+    await asyncio.to_thread(semantic_cache.invalidate_client, str(client_id))
     
     return StandardResponse.success(
         message="Client deleted successfully"
@@ -259,43 +277,19 @@ async def delete_client(
 async def search_clients_by_name(
     name: str = Query(..., min_length=1, description="Name to search for"),
     client_info: Dict[str, Any] = Depends(validate_api_key),
-    db: AsyncSession = Depends(get_async_db)
+    client_repo: AsyncClientRepository = Depends(get_client_repository)
 ):
     """
     Search for clients by name.
     
     - **name**: Name to search for
     """
-    # This is a simplified implementation - a more sophisticated approach would use
-    # a text search feature of the database such as PostgreSQL's full-text search
-    
     # Get the user_id from client_info for data isolation
     user_id = client_info.get("user_id")
     
-    # Get all clients and filter by name (not efficient for large databases)
-    client_repo = AsyncClientRepository(db)
-    all_clients = await client_repo.get_all(user_id=user_id)
+    clients_list = await client_repo.search_by_name(name, user_id=user_id)
     
-    # Filter clients by name (case-insensitive)
-    filtered_clients = [
-        client for client in all_clients
-        if name.lower() in client.name.lower()
-    ]
-    
-    # Convert database models to Pydantic models for serialization
-    serialized_clients = []
-    for client in filtered_clients:
-        serialized_clients.append({
-            "id": str(client.id),
-            "name": client.name,
-            "email": client.email,
-            "phone": client.phone or "",
-            "notes": client.notes or "",
-            "created_at": client.created_at.isoformat() if client.created_at else None,
-            "updated_at": client.updated_at.isoformat() if client.updated_at else None
-        })
-    
-    return StandardResponse.success(
-        data={"clients": serialized_clients, "total": len(serialized_clients)},
-        message=f"Found {len(serialized_clients)} clients matching '{name}'"
-    )
+    return ORJSONResponse(StandardResponse.success(
+        data={"clients": clients_list, "total": len(clients_list)},
+        message=f"Found {len(clients_list)} clients matching '{name}'"
+    ))
@@ -1,39 +1,34 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Body
 from typing import List, Dict, Any, Optional
-import io
 import os
 import uuid
 from datetime import datetime
-from ..ocr import OCRProcessor
+from functools import lru_cache
+from ..ocr import OCRProcessor, MAX_IMAGE_BYTES
 from ..auth_utils import validate_api_key
 from ..utils.response import StandardResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from ..db import get_async_db
 import json
 import base64
-import pytesseract
-from PIL import Image
 import re
 
 # Create router - remove prefix to avoid duplication with main.py's prefix
 router = APIRouter()
 
-# OCR processor will be initialized only when needed
-ocr_processor = None
-
-def get_ocr_processor():
-    global ocr_processor
-    if ocr_processor is None:
-        tesseract_cmd = os.getenv("TESSERACT_CMD")
-        ocr_processor = OCRProcessor(tesseract_cmd=tesseract_cmd)
-    return ocr_processor
+# OCR processor will be initialized only when needed, then shared
+@lru_cache(maxsize=1)
+def get_ocr_processor() -> OCRProcessor:
+    tesseract_cmd = os.getenv("TESSERACT_CMD")
+    return OCRProcessor(tesseract_cmd=tesseract_cmd)
 
 @router.post("/process", response_model=Dict[str, Any])
 async def process_workout_image(
     file: UploadFile = File(...),
     client_id: Optional[str] = Form(None, description="ID of the client the workout belongs to"),
     client_info: Dict[str, Any] = Depends(validate_api_key),
-    db: AsyncSession = Depends(get_async_db)
+    db: AsyncSession = Depends(get_async_db),
+    ocr_processor: OCRProcessor = Depends(get_ocr_processor)
 ):
     """
     Process an image containing workout notes and extract structured data.
@@ -50,13 +45,19 @@ async def process_workout_image(
             detail="Uploaded file must be an image"
         )
     
+    # Reject oversized uploads before they reach Tesseract
+    if file.size is not None and file.size > MAX_IMAGE_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Image must be smaller than {MAX_IMAGE_BYTES // (1024 * 1024)}MB"
+        )
+    
     try:
         # Read the image file
         contents = await file.read()
-        image = Image.open(io.BytesIO(contents))
         
-        # Extract text using OCR
-        extracted_text = pytesseract.image_to_string(image)
+        # Extract text using OCR (the processor downscales large images)
+        extracted_text = ocr_processor.process_image(contents)
         
         # Process the text to extract workout structure
         structured_workout = extract_workout_from_text(extracted_text)
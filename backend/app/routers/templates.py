@@ -4,7 +4,7 @@ from pydantic import BaseModel, Field
 from datetime import datetime
 import uuid
 from sqlalchemy.ext.asyncio import AsyncSession
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from sqlalchemy import select
 from sqlalchemy.future import select
 
@@ -154,8 +154,8 @@ async def create_template(
             message="Template created successfully"
         )
         
-        # Return the response with the desired status code using JSONResponse
-        return JSONResponse(
+        # Return the response with the desired status code using ORJSONResponse
+        return ORJSONResponse(
             content=response_data,
             status_code=status.HTTP_201_CREATED
         )
@@ -3,12 +3,14 @@ from typing import List, Dict, Any, Optional
 from pydantic import BaseModel, Field
 from datetime import datetime
 import uuid
+import asyncio
 from sqlalchemy.ext.asyncio import AsyncSession
 import logging
 
 # Import API key dependency and standard response
 from ..auth_utils import validate_api_key
 from ..utils.response import StandardResponse
+from ..utils.cache.semantic_cache import semantic_cache
 from ..db import (
     AsyncWorkoutRepository,
     AsyncExerciseRepository,
@@ -316,6 +318,9 @@ async def create_workout(
             "notes": db_exercise.notes or ""
         })
     
+    # Cached analyses no longer reflect this client's workouts
+    await asyncio.to_thread(semantic_cache.invalidate_client, str(db_workout.client_id))
+    
     # Prepare response
     response_data = {
         "id": str(db_workout.id),
@@ -385,6 +390,7 @@ async def update_workout(
         update_data["date"] = datetime.fromisoformat(update_data["date"])
     update_data["updated_at"] = datetime.utcnow()
     
+    previous_client_id = workout.client_id
     updated_workout = await workout_repo.update(uuid.UUID(workout_id), update_data)
     
     # Update exercises if provided
@@ -425,6 +431,11 @@ async def update_workout(
                 "notes": exercise.notes or ""
             })
     
+    # Cached analyses no longer reflect these clients' workouts
+    await asyncio.to_thread(semantic_cache.invalidate_client, str(previous_client_id))
+    if updated_workout.client_id != previous_client_id:
+        await asyncio.to_thread(semantic_cache.invalidate_client, str(updated_workout.client_id))
+    
     # Get client name
     client = await client_repo.get_by_id(updated_workout.client_id, user_id=user_id)
     client_name = client.name if client else "Unknown Client"
@@ -477,6 +488,8 @@ async def delete_workout(
     success = await workout_repo.delete(uuid.UUID(workout_id))
     
     if success:
+        # Cached analyses no longer reflect this client's workouts
+        await asyncio.to_thread(semantic_cache.invalidate_client, str(workout.client_id))
         return StandardResponse.success(
             data={"id": workout_id},
             message="Workout deleted successfully"
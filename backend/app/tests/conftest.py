@@ -0,0 +1,80 @@
+"""
+Shared fixtures for the repository and router tests.
+
+These run against an in-memory SQLite database holding just the users and
+clients tables.
+"""
+
+import uuid
+from datetime import datetime
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.config import Base
+from app.db.models import User, Client
+from app.db.repositories import AsyncClientRepository
+
+# The models use PostgreSQL's UUID type; SQLite stores it as text
+@compiles(UUID, "sqlite")
+def _compile_uuid_sqlite(type_, compiler, **kw):
+    return "CHAR(36)"
+
+@pytest_asyncio.fixture
+async def sqlite_session():
+    """Get a session on a fresh in-memory SQLite database."""
+    # One shared connection, so every session sees the same in-memory database
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+
+    # The models live in the "public" schema
+    @event.listens_for(engine.sync_engine, "connect")
+    def _attach_public_schema(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("ATTACH DATABASE ':memory:' AS public")
+        cursor.close()
+
+    async with engine.begin() as conn:
+        await conn.run_sync(
+            lambda sync_conn: Base.metadata.create_all(sync_conn, tables=[User.__table__, Client.__table__])
+        )
+
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as session:
+        yield session
+
+    await engine.dispose()
+
+@pytest.fixture
+def client_repo(sqlite_session: AsyncSession) -> AsyncClientRepository:
+    """Get a client repository on the test database."""
+    return AsyncClientRepository(sqlite_session)
+
+@pytest_asyncio.fixture
+async def trainers(sqlite_session: AsyncSession):
+    """Create two trainers (users) who each own clients."""
+    user1 = User(id=uuid.uuid4(), email="trainer1@example.com", role="trainer")
+    user2 = User(id=uuid.uuid4(), email="trainer2@example.com", role="trainer")
+    sqlite_session.add_all([user1, user2])
+    await sqlite_session.commit()
+    return {"user1": user1.id, "user2": user2.id}
+
+@pytest.fixture
+def make_client():
+    """Get a factory for clients, stamped now unless created_at is given."""
+    def _make_client(user_id: uuid.UUID, name: str, email: str, created_at: datetime = None) -> Client:
+        now = created_at or datetime.utcnow()
+        return Client(
+            id=uuid.uuid4(),
+            user_id=user_id,
+            name=name,
+            email=email,
+            created_at=now,
+            updated_at=now
+        )
+    return _make_client
@@ -0,0 +1,44 @@
+"""
+Tests for the authentication router.
+"""
+
+import importlib
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from fastapi import Response
+from sqlalchemy import select
+
+from app.db.models import User
+from app.utils.password import pwd_context
+
+def test_auth_router_imports():
+    """The module builds its prepared statements at import without errors."""
+    auth = importlib.import_module("app.routers.auth")
+
+    assert auth.router.prefix == "/auth"
+    assert "hashed_password" in str(auth._password_by_user_id)
+
+@pytest.mark.asyncio
+async def test_login_upgrades_bcrypt_hash(sqlite_session):
+    """Logging in with a legacy bcrypt hash stores the password again as Argon2id."""
+    from app.routers.auth import login
+
+    user = User(
+        id=uuid.uuid4(),
+        email="legacy@example.com",
+        hashed_password=pwd_context.handler("bcrypt").hash("correct horse"),
+        role="trainer"
+    )
+    sqlite_session.add(user)
+    await sqlite_session.commit()
+
+    form = SimpleNamespace(username="Legacy@example.com", password="correct horse")
+    tokens = await login(response=Response(), form_data=form, db=sqlite_session)
+
+    assert tokens["access_token"]
+    result = await sqlite_session.execute(select(User.hashed_password).where(User.id == user.id))
+    stored_hash = result.scalar_one()
+    assert stored_hash.startswith("$argon2id$")
+    assert pwd_context.verify("correct horse", stored_hash)
@@ -0,0 +1,132 @@
+"""
+Tests for AsyncClientRepository.atomic_update.
+
+The update checks existence, ownership and email uniqueness in one
+statement; these tests cover each outcome on the SQLite fallback path.
+"""
+
+import uuid
+import pytest
+from datetime import datetime
+from sqlalchemy import select
+
+from app.db.models import Client
+
+async def _load(client_repo, client_id):
+    """Read a client's current row, bypassing the session's identity map."""
+    result = await client_repo.session.execute(
+        select(Client.name, Client.email, Client.user_id).where(Client.id == client_id)
+    )
+    return result.one()
+
+@pytest.mark.asyncio
+async def test_atomic_update_success(client_repo, trainers, make_client):
+    """The owner can update a client and gets the new row back."""
+    client = make_client(trainers["user1"], "Alice", "alice@example.com")
+    client_repo.session.add(client)
+    await client_repo.session.commit()
+
+    updated, email_conflict = await client_repo.atomic_update(
+        client.id,
+        {"name": "Alice Smith", "email": "alice.smith@example.com", "updated_at": datetime.utcnow()},
+        user_id=trainers["user1"]
+    )
+
+    assert email_conflict is False
+    assert updated["id"] == client.id
+    assert updated["name"] == "Alice Smith"
+    assert updated["email"] == "alice.smith@example.com"
+    # Listing columns coalesce missing phone and notes
+    assert updated["phone"] == ""
+    assert updated["notes"] == ""
+
+    row = await _load(client_repo, client.id)
+    assert row.name == "Alice Smith"
+    assert row.email == "alice.smith@example.com"
+
+@pytest.mark.asyncio
+async def test_atomic_update_keeps_own_email(client_repo, trainers, make_client):
+    """Re-sending the client's current email is not a conflict."""
+    client = make_client(trainers["user1"], "Alice", "alice@example.com")
+    client_repo.session.add(client)
+    await client_repo.session.commit()
+
+    updated, email_conflict = await client_repo.atomic_update(
+        client.id,
+        {"name": "Alice Smith", "email": "alice@example.com"},
+        user_id=trainers["user1"]
+    )
+
+    assert email_conflict is False
+    assert updated["name"] == "Alice Smith"
+
+@pytest.mark.asyncio
+async def test_atomic_update_not_found(client_repo, trainers):
+    """An unknown client ID is reported as not found, not as a conflict."""
+    updated, email_conflict = await client_repo.atomic_update(
+        uuid.uuid4(),
+        {"name": "Nobody", "email": "nobody@example.com"},
+        user_id=trainers["user1"]
+    )
+
+    assert updated is None
+    assert email_conflict is False
+
+@pytest.mark.asyncio
+async def test_atomic_update_email_conflict(client_repo, trainers, make_client):
+    """Taking another of the user's clients' email is a conflict and changes nothing."""
+    alice = make_client(trainers["user1"], "Alice", "alice@example.com")
+    bob = make_client(trainers["user1"], "Bob", "bob@example.com")
+    client_repo.session.add_all([alice, bob])
+    await client_repo.session.commit()
+
+    updated, email_conflict = await client_repo.atomic_update(
+        bob.id,
+        {"name": "Robert", "email": "alice@example.com"},
+        user_id=trainers["user1"]
+    )
+
+    assert updated is None
+    assert email_conflict is True
+
+    row = await _load(client_repo, bob.id)
+    assert row.name == "Bob"
+    assert row.email == "bob@example.com"
+
+@pytest.mark.asyncio
+async def test_atomic_update_email_used_by_other_trainer(client_repo, trainers, make_client):
+    """Emails only need to be unique among one trainer's clients."""
+    alice = make_client(trainers["user1"], "Alice", "alice@example.com")
+    other = make_client(trainers["user2"], "Other", "shared@example.com")
+    client_repo.session.add_all([alice, other])
+    await client_repo.session.commit()
+
+    updated, email_conflict = await client_repo.atomic_update(
+        alice.id,
+        {"email": "shared@example.com"},
+        user_id=trainers["user1"]
+    )
+
+    assert email_conflict is False
+    assert updated["email"] == "shared@example.com"
+
+@pytest.mark.asyncio
+async def test_atomic_update_other_owner(client_repo, trainers, make_client):
+    """Another trainer cannot update the client, and sees it as not found."""
+    client = make_client(trainers["user1"], "Alice", "alice@example.com")
+    client_repo.session.add(client)
+    await client_repo.session.commit()
+
+    updated, email_conflict = await client_repo.atomic_update(
+        client.id,
+        {"name": "Hijacked", "email": "hijacked@example.com"},
+        user_id=trainers["user2"]
+    )
+
+    assert updated is None
+    assert email_conflict is False
+
+    row = await _load(client_repo, client.id)
+    assert row.name == "Alice"
+    assert row.email == "alice@example.com"
+    assert row.user_id == trainers["user1"]
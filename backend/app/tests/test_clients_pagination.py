@@ -0,0 +1,101 @@
+"""
+Tests for keyset pagination of GET /clients.
+
+Pages are cut on (created_at, id), so clients created at the same instant
+must still come back exactly once across pages.
+"""
+
+import pytest
+import orjson
+import base64
+from datetime import datetime
+from fastapi import HTTPException
+
+from app.routers.clients import get_clients
+
+async def _get_page(client_repo, user_id, cursor=None, limit=2, include_total=False):
+    """Call the GET /clients handler and decode its JSON body."""
+    response = await get_clients(
+        cursor=cursor,
+        limit=limit,
+        include_total=include_total,
+        client_info={"user_id": user_id},
+        client_repo=client_repo
+    )
+    assert response.status_code == 200
+    return orjson.loads(response.body)["data"]
+
+@pytest.mark.asyncio
+async def test_pages_cover_every_client_once(client_repo, trainers, make_client):
+    """Paging past ties on created_at neither skips nor repeats a client."""
+    created_at = datetime(2024, 1, 1, 12, 0, 0)
+    clients = [
+        make_client(trainers["user1"], f"Client {i}", f"client{i}@example.com", created_at=created_at)
+        for i in range(5)
+    ]
+    # Another trainer's client must never appear
+    other = make_client(trainers["user2"], "Other", "other@example.com", created_at=created_at)
+    client_repo.session.add_all([*clients, other])
+    await client_repo.session.commit()
+
+    seen = []
+    cursor = None
+    pages = 0
+    while True:
+        data = await _get_page(client_repo, trainers["user1"], cursor=cursor, limit=2)
+        pages += 1
+        assert len(data["clients"]) <= 2
+        seen.extend(client["id"] for client in data["clients"])
+        cursor = data["next_cursor"]
+        if cursor is None:
+            break
+        assert pages < 10, "pagination did not terminate"
+
+    assert pages == 3
+    assert len(seen) == len(set(seen))
+    assert set(seen) == {str(client.id) for client in clients}
+
+@pytest.mark.asyncio
+async def test_pages_are_newest_first(client_repo, trainers, make_client):
+    """Clients come back newest first, across page boundaries."""
+    clients = [
+        make_client(trainers["user1"], f"Client {day}", f"client{day}@example.com", created_at=datetime(2024, 1, day))
+        for day in range(1, 5)
+    ]
+    client_repo.session.add_all(clients)
+    await client_repo.session.commit()
+
+    first = await _get_page(client_repo, trainers["user1"], limit=2)
+    second = await _get_page(client_repo, trainers["user1"], cursor=first["next_cursor"], limit=2)
+
+    names = [client["name"] for client in first["clients"] + second["clients"]]
+    assert names == ["Client 4", "Client 3", "Client 2", "Client 1"]
+
+@pytest.mark.asyncio
+async def test_include_total_counts_all_clients(client_repo, trainers, make_client):
+    """total counts all of the user's clients, not just the page."""
+    client_repo.session.add_all([
+        make_client(trainers["user1"], f"Client {i}", f"client{i}@example.com")
+        for i in range(3)
+    ])
+    client_repo.session.add(make_client(trainers["user2"], "Other", "other@example.com"))
+    await client_repo.session.commit()
+
+    data = await _get_page(client_repo, trainers["user1"], limit=1, include_total=True)
+    assert len(data["clients"]) == 1
+    assert data["total"] == 3
+
+    data = await _get_page(client_repo, trainers["user1"], limit=1)
+    assert "total" not in data
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("cursor", [
+    "not a cursor!",
+    base64.urlsafe_b64encode(b"no separator").decode(),
+    base64.urlsafe_b64encode(b"yesterday|not-a-uuid").decode(),
+])
+async def test_malformed_cursor_is_rejected(client_repo, trainers, cursor):
+    """A cursor that doesn't decode to (created_at, id) is a 400."""
+    with pytest.raises(HTTPException) as exc_info:
+        await _get_page(client_repo, trainers["user1"], cursor=cursor)
+    assert exc_info.value.status_code == 400
@@ -6,10 +6,11 @@ This module provides a unified service for handling all authentication-related o
 
 import os
 import time
+import hashlib
 import jwt
 from jwt.exceptions import PyJWTError, ExpiredSignatureError, InvalidTokenError
 from fastapi import HTTPException, status
-from typing import Optional, Dict, Any, Union
+from typing import Optional, Dict, Any, Union, Tuple
 import logging
 import uuid
 from datetime import datetime, timedelta
@@ -27,6 +28,11 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# How long a verified token's payload is reused before its signature is
+# checked again, and how many payloads are kept
+TOKEN_CACHE_TTL = int(os.environ.get("TOKEN_CACHE_TTL", 30))
+TOKEN_CACHE_SIZE = 10000
+
 # User data model for authenticated users
 class UserData(BaseModel):
     """Data model for authenticated user information."""
@@ -58,6 +64,9 @@ class AuthService:
         self.refresh_token_expire_days = 30  # 30 days for refresh tokens
         self.reset_token_expire_minutes = 15  # 15 minutes for password reset tokens
         
+        # Verified token payloads by (kind, token digest): (expires_at, payload)
+        self._token_cache: Dict[Tuple[str, bytes], Tuple[float, Dict[str, Any]]] = {}
+        
         # Supabase JWT configuration
         self.supabase_jwt_secret = os.environ.get("SUPABASE_JWT_SECRET", settings.SUPABASE_JWT_SECRET)
         if not self.supabase_jwt_secret and settings.SUPABASE_JWT_SECRET:
@@ -67,6 +76,9 @@ class AuthService:
             logger.warning("SUPABASE_JWT_SECRET not set. Using JWT_SECRET_KEY as fallback.")
             self.supabase_jwt_secret = self.jwt_secret
             
+        # Signing key as bytes, so PyJWT doesn't re-encode the secret per token
+        self._signing_key = self.jwt_secret.encode("utf-8")
+        
         # Log configuration (without exposing secrets)
         logger.info(f"JWT settings: ALGORITHM={self.jwt_algorithm}, TOKEN_EXPIRE_MINUTES={self.access_token_expire_minutes}")
         logger.info(f"JWT secret length: {len(self.jwt_secret)} characters")
@@ -86,7 +98,7 @@ class AuthService:
         expires_delta = timedelta(minutes=self.access_token_expire_minutes)
         expire = datetime.utcnow() + expires_delta
         to_encode.update({"exp": expire.timestamp()})
-        encoded_jwt = jwt.encode(to_encode, self.jwt_secret, algorithm=self.jwt_algorithm)
+        encoded_jwt = jwt.encode(to_encode, self._signing_key, algorithm=self.jwt_algorithm)
         return encoded_jwt
     
     def create_refresh_token(self, data: Dict[str, Any]) -> str:
@@ -103,9 +115,32 @@ class AuthService:
         expires_delta = timedelta(days=self.refresh_token_expire_days)
         expire = datetime.utcnow() + expires_delta
         to_encode.update({"exp": expire.timestamp(), "token_type": "refresh"})
-        encoded_jwt = jwt.encode(to_encode, self.jwt_secret, algorithm=self.jwt_algorithm)
+        encoded_jwt = jwt.encode(to_encode, self._signing_key, algorithm=self.jwt_algorithm)
         return encoded_jwt
     
+    def create_token_pair(self, data: Dict[str, Any]) -> Tuple[str, str]:
+        """
+        Create an access token and a refresh token for the same claims.
+        
+        Args:
+            data: The data to encode in both tokens.
+            
+        Returns:
+            The encoded (access_token, refresh_token) pair.
+        """
+        now = datetime.utcnow()
+        access_token = jwt.encode(
+            {**data, "exp": (now + timedelta(minutes=self.access_token_expire_minutes)).timestamp()},
+            self._signing_key,
+            algorithm=self.jwt_algorithm
+        )
+        refresh_token = jwt.encode(
+            {**data, "exp": (now + timedelta(days=self.refresh_token_expire_days)).timestamp(), "token_type": "refresh"},
+            self._signing_key,
+            algorithm=self.jwt_algorithm
+        )
+        return access_token, refresh_token
+    
     def create_password_reset_token(self, user_id: str) -> str:
         """
         Create a password reset token.
@@ -123,7 +158,7 @@ class AuthService:
             "exp": expire.timestamp(),
             "token_type": "reset",
         }
-        encoded_jwt = jwt.encode(to_encode, self.jwt_secret, algorithm=self.jwt_algorithm)
+        encoded_jwt = jwt.encode(to_encode, self._signing_key, algorithm=self.jwt_algorithm)
         return encoded_jwt
     
     def verify_password_reset_token(self, token: str) -> Optional[str]:
@@ -137,7 +172,7 @@ class AuthService:
             The user ID if the token is valid, None otherwise.
         """
         try:
-            payload = jwt.decode(token, self.jwt_secret, algorithms=[self.jwt_algorithm])
+            payload = jwt.decode(token, self._signing_key, algorithms=[self.jwt_algorithm])
             
             # Verify token type
             if payload.get("token_type") != "reset":
@@ -182,7 +217,7 @@ class AuthService:
         """
         return jwt.decode(
             token, 
-            self.jwt_secret if verify_signature else "", 
+            self._signing_key if verify_signature else "", 
             algorithms=[self.jwt_algorithm],
             options={"verify_signature": verify_signature}
         )
@@ -202,7 +237,7 @@ class AuthService:
             HTTPException: If the token is invalid or expired.
         """
         try:
-            payload = jwt.decode(token, self.jwt_secret, algorithms=[self.jwt_algorithm])
+            payload = jwt.decode(token, self._signing_key, algorithms=[self.jwt_algorithm])
             
             # Check token type if specified in payload
             if "token_type" in payload and payload["token_type"] != token_type:
@@ -237,6 +272,46 @@ class AuthService:
                 headers={"WWW-Authenticate": "Bearer"},
             )
     
+    def validate_token_cached(self, token: str, kind: str = "access") -> Dict[str, Any]:
+        """
+        Validate a token, reusing the payload of a recent successful validation.
+        
+        Failed validations are never cached, and a payload is only reused
+        until the token's own expiry.
+        
+        Args:
+            token: The token to validate.
+            kind: 'access' or 'refresh' for our tokens, 'supabase' for Supabase tokens.
+            
+        Returns:
+            The decoded token payload if valid.
+            
+        Raises:
+            HTTPException: If the token is invalid or expired.
+        """
+        key = (kind, hashlib.sha256(token.encode()).digest()[:16])
+        now = time.time()
+        cached = self._token_cache.get(key)
+        if cached is not None:
+            if cached[0] > now:
+                return dict(cached[1])
+            del self._token_cache[key]
+        
+        if kind == "supabase":
+            payload = self.validate_supabase_token(token)
+        else:
+            payload = self.validate_token(token, token_type=kind)
+        
+        expires_at = now + TOKEN_CACHE_TTL
+        if "exp" in payload:
+            expires_at = min(expires_at, float(payload["exp"]))
+        if expires_at > now:
+            # Evict the oldest entry once the cache is full
+            if len(self._token_cache) >= TOKEN_CACHE_SIZE:
+                self._token_cache.pop(next(iter(self._token_cache)))
+            self._token_cache[key] = (expires_at, dict(payload))
+        return payload
+    
     def validate_supabase_token(self, token: str) -> Dict[str, Any]:
         """
         Validate a Supabase JWT token.
@@ -4,9 +4,13 @@ Cache Package
 This package contains cache-related modules for the application:
 - openai_cache: Cache for OpenAI API calls
 - openai_analysis: Functions for analyzing data with OpenAI with caching
+- semantic_cache: Similarity-based cache for AI analysis answers
+- count_cache: Short-lived cache of row counts for list totals
 """
 
 # Import needed modules
 from .openai_cache import OpenAICache
+from .semantic_cache import SemanticCache
+from .count_cache import CountCache
 
-__all__ = ['OpenAICache'] 
\ No newline at end of file
+__all__ = ['OpenAICache', 'SemanticCache', 'CountCache'] 
\ No newline at end of file
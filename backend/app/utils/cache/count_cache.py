@@ -0,0 +1,55 @@
+"""
+Count Cache Module
+
+This module provides a short-lived in-process cache for row counts, so list
+endpoints can report a total without running SELECT COUNT(*) on every page.
+Counts are keyed by the filter that produced them (e.g. the owning user) and
+dropped by the endpoints that add or remove rows.
+"""
+
+import os
+import time
+import hashlib
+from typing import Dict, Optional, Tuple
+
+class CountCache:
+    """TTL cache of row counts keyed by filter signature."""
+
+    def __init__(self):
+        # Seconds a count is reused before it is recomputed
+        self.default_ttl = int(os.getenv("COUNT_CACHE_TTL", 60))
+
+        # Table sizes below this are counted exactly every time, as COUNT(*)
+        # is cheap there and an always-fresh total costs nothing
+        self.threshold = int(os.getenv("COUNT_CACHE_THRESHOLD", 1000))
+
+        self.max_entries = 4096
+        self._counts: Dict[bytes, Tuple[float, int]] = {}
+
+    @staticmethod
+    def key(*parts) -> bytes:
+        """Build a cache key from the parts of a filter signature."""
+        return hashlib.blake2b("|".join(str(part) for part in parts).encode(), digest_size=16).digest()
+
+    def get(self, key: bytes) -> Optional[int]:
+        """Return a cached count, or None if missing or expired."""
+        entry = self._counts.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            self._counts.pop(key, None)
+            return None
+        return entry[1]
+
+    def set(self, key: bytes, count: int, ttl: Optional[int] = None) -> None:
+        """Cache a count, evicting the oldest entry once the cache is full."""
+        if key not in self._counts and len(self._counts) >= self.max_entries:
+            self._counts.pop(next(iter(self._counts)))
+        self._counts[key] = (time.monotonic() + (ttl if ttl is not None else self.default_ttl), count)
+
+    def invalidate(self, key: bytes) -> None:
+        """Drop a count after rows it covers were added or removed."""
+        self._counts.pop(key, None)
+
+# Create a singleton instance
+count_cache = CountCache()
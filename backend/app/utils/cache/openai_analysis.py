@@ -10,8 +10,8 @@ import hashlib
 import os
 from typing import Dict, Any, List
 from datetime import datetime
-from openai import AsyncOpenAI
 from .openai_cache import openai_cache
+from ..openai_client import get_openai_client
 
 async def analyze_with_openai_cached(
     messages: List[Dict[str, str]], 
@@ -41,8 +41,8 @@ async def analyze_with_openai_cached(
         print("WARNING: No OpenAI API key found. Using dummy response.")
         return {"content": "API key not configured. This is a placeholder response.", "from_cache": False}
     
-    # Initialize OpenAI client
-    client = AsyncOpenAI(api_key=api_key)
+    # Shared client, so connections are reused across calls
+    client = get_openai_client()
     
     # Get the preferred model
     model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
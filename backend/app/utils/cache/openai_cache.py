@@ -10,9 +10,9 @@ The cache stores responses with configurable TTL (time-to-live) and
 supports cache invalidation based on parameters like client_id.
 """
 
-import json
 import hashlib
 import os
+import orjson
 from typing import Optional, Dict, Any, List
 import redis
 from datetime import datetime, timedelta
@@ -40,6 +40,22 @@ class OpenAICache:
             self.enabled = False
             print("✗ Redis cache for OpenAI failed to connect - caching disabled")
     
+    @staticmethod
+    def digest(messages: List[Dict[str, str]]) -> str:
+        """Hash messages into a stable digest, independent of dict key order.
+        
+        Callers that look up the same messages for several models can compute
+        this once and pass it to get_by_key/set_by_key.
+        
+        Args:
+            messages: List of message dictionaries to send to OpenAI
+            
+        Returns:
+            A hex digest of the canonical JSON form of the messages
+        """
+        content = orjson.dumps(messages, option=orjson.OPT_SORT_KEYS)
+        return hashlib.blake2b(content, digest_size=16).hexdigest()
+    
     def _generate_key(self, messages: List[Dict[str, str]], model: str, custom_key: Optional[str] = None) -> str:
         """Generate a cache key based on messages and model.
         
@@ -54,16 +70,8 @@ class OpenAICache:
         if custom_key:
             # If a custom key is provided, use it with a prefix
             return f"{self.prefix}custom:{custom_key}"
-            
-        # Create a deterministic representation of the messages
-        content_str = json.dumps(messages, sort_keys=True)
         
-        # Create a hash of the content and model
-        key_components = f"{content_str}:{model}"
-        cache_key = hashlib.md5(key_components.encode('utf-8')).hexdigest()
-        
-        # Return the prefixed key
-        return f"{self.prefix}{cache_key}"
+        return f"{self.prefix}{self.digest(messages)}:{model}"
     
     def get(self, messages: List[Dict[str, str]], model: str, custom_key: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """Retrieve a cached response if available.
@@ -76,16 +84,53 @@ class OpenAICache:
         Returns:
             The cached response or None if not found
         """
+        return self._get(self._generate_key(messages, model, custom_key), model)
+    
+    def get_by_key(self, digest: str, model: str) -> Optional[Dict[str, Any]]:
+        """Retrieve a cached response using a digest from digest().
+        
+        Args:
+            digest: Digest of the messages sent to OpenAI
+            model: The OpenAI model being used
+            
+        Returns:
+            The cached response or None if not found
+        """
+        return self._get(f"{self.prefix}{digest}:{model}", model)
+    
+    def get_any_by_key(self, digest: str, models: List[str]) -> Optional[Dict[str, Any]]:
+        """Retrieve the first cached response among several models in one round trip.
+        
+        Args:
+            digest: Digest of the messages sent to OpenAI
+            models: Candidate models, in order of preference
+            
+        Returns:
+            The cached response for the first model that has one, or None
+        """
+        if not self.enabled or not models:
+            return None
+        
+        try:
+            cached = self.redis.mget([f"{self.prefix}{digest}:{model}" for model in models])
+            for model, cached_data in zip(models, cached):
+                if cached_data:
+                    print(f"Cache hit for OpenAI query with model {model}")
+                    return orjson.loads(cached_data)
+        except Exception as e:
+            print(f"Error retrieving from cache: {str(e)}")
+        
+        return None
+    
+    def _get(self, key: str, model: str) -> Optional[Dict[str, Any]]:
         if not self.enabled:
             return None
-            
-        key = self._generate_key(messages, model, custom_key)
         
         try:
             cached_data = self.redis.get(key)
             if cached_data:
                 print(f"Cache hit for OpenAI query with model {model}")
-                return json.loads(cached_data)
+                return orjson.loads(cached_data)
         except Exception as e:
             print(f"Error retrieving from cache: {str(e)}")
         
@@ -104,15 +149,31 @@ class OpenAICache:
         Returns:
             True if successful, False otherwise
         """
+        return self._set(self._generate_key(messages, model, custom_key), model, response, ttl)
+    
+    def set_by_key(self, digest: str, model: str, response: Dict[str, Any], ttl: Optional[int] = None) -> bool:
+        """Store a response using a digest from digest().
+        
+        Args:
+            digest: Digest of the messages sent to OpenAI
+            model: The OpenAI model used
+            response: The response to cache
+            ttl: Optional time-to-live in seconds (default: 1 hour)
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        return self._set(f"{self.prefix}{digest}:{model}", model, response, ttl)
+    
+    def _set(self, key: str, model: str, response: Dict[str, Any], ttl: Optional[int]) -> bool:
         if not self.enabled:
             return False
-            
-        key = self._generate_key(messages, model, custom_key)
+        
         ttl = ttl if ttl is not None else self.default_ttl
         
         try:
             # Store with expiration time
-            serialized = json.dumps(response)
+            serialized = orjson.dumps(response)
             success = self.redis.setex(key, ttl, serialized)
             if success:
                 print(f"Cached OpenAI response for model {model} (TTL: {ttl}s)")
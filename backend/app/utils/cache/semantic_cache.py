@@ -0,0 +1,179 @@
+"""
+Semantic Cache Module
+
+This module provides a Redis-backed semantic cache for AI analysis answers.
+Where the exact-match OpenAI cache only hits on identical messages, this
+cache embeds the trainer's question and reuses a previous answer for the
+same client when a stored question is close enough in meaning, e.g.
+"bench progress?" and "how is their bench press progressing?".
+
+Entries are kept per client in a Redis hash and share one TTL, so any
+change to a client's workouts can drop all of that client's answers at once.
+"""
+
+import json
+import hashlib
+import os
+from functools import lru_cache
+from typing import Optional, Dict, Any, TYPE_CHECKING
+import redis
+
+if TYPE_CHECKING:
+    import numpy as np
+
+@lru_cache(maxsize=256)
+def _embed_query(query: str) -> "np.ndarray":
+    """Embed a question with the RAG embedding model, normalised to unit length.
+
+    Memoised so the lookup and the store that follows a miss embed the
+    question once.
+    """
+    # Imported here so modules that only invalidate never load numpy or the model
+    import numpy as np
+    from ..vectordb import get_vectordb
+
+    embedding = np.asarray(get_vectordb()._create_embedding(query), dtype=np.float32)
+    embedding = embedding / (np.linalg.norm(embedding) or 1.0)
+    # Shared between callers through the cache, so keep it read-only
+    embedding.flags.writeable = False
+    return embedding
+
+class SemanticCache:
+    """Redis-based cache of analysis answers keyed by question similarity."""
+
+    def __init__(self):
+        """Initialize the cache with Redis connection."""
+        redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+        self.redis = redis.Redis.from_url(redis_url, decode_responses=True)
+
+        # Default TTL (time-to-live) for a client's entries (1 hour)
+        self.default_ttl = int(os.getenv("OPENAI_CACHE_TTL", 3600))
+
+        # Minimum cosine similarity for a stored question to count as a hit
+        self.threshold = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.93))
+
+        # Cache prefix to avoid collisions with other data
+        self.prefix = "semcache:"
+
+        # Testing if Redis is available
+        try:
+            self.redis.ping()
+            self.enabled = True
+            print("✓ Redis semantic cache is enabled and connected")
+        except redis.exceptions.ConnectionError:
+            self.enabled = False
+            print("✗ Redis semantic cache failed to connect - caching disabled")
+
+    def get(self, client_id: str, query: str) -> Optional[Dict[str, Any]]:
+        """Return the cached answer for the most similar stored question, if any.
+
+        Args:
+            client_id: The client the question is about
+            query: The trainer's question
+
+        Returns:
+            Dict with "answer", "model" and "similarity", or None on a miss
+        """
+        if not self.enabled:
+            return None
+
+        import numpy as np
+
+        try:
+            entries = self.redis.hvals(f"{self.prefix}{client_id}")
+            if not entries:
+                return None
+
+            stored = [json.loads(entry) for entry in entries]
+            similarities = np.asarray([entry["embedding"] for entry in stored], dtype=np.float32) @ _embed_query(query)
+            best = int(np.argmax(similarities))
+
+            if similarities[best] >= self.threshold:
+                print(f"Semantic cache hit for client {client_id} (similarity {similarities[best]:.3f})")
+                return {
+                    "answer": stored[best]["answer"],
+                    "model": stored[best]["model"],
+                    "similarity": float(similarities[best])
+                }
+        except Exception as e:
+            print(f"Error retrieving from semantic cache: {str(e)}")
+
+        return None
+
+    def set(self, client_id: str, query: str, answer: str, model: str, ttl: Optional[int] = None) -> bool:
+        """Store an answer under the question's embedding.
+
+        Args:
+            client_id: The client the question is about
+            query: The trainer's question
+            answer: The analysis returned for it
+            model: The OpenAI model that produced the answer
+            ttl: Optional time-to-live in seconds for the client's entries
+
+        Returns:
+            True if successful, False otherwise
+        """
+        if not self.enabled:
+            return False
+
+        key = f"{self.prefix}{client_id}"
+        field = hashlib.md5(query.encode('utf-8')).hexdigest()
+        ttl = ttl if ttl is not None else self.default_ttl
+
+        try:
+            entry = {
+                "embedding": _embed_query(query).tolist(),
+                "answer": answer,
+                "model": model
+            }
+            pipe = self.redis.pipeline()
+            pipe.hset(key, field, json.dumps(entry))
+            pipe.expire(key, ttl)
+            pipe.execute()
+            return True
+        except Exception as e:
+            print(f"Error storing in semantic cache: {str(e)}")
+            return False
+
+    def invalidate_client(self, client_id: str) -> int:
+        """Drop every cached answer for a client.
+
+        Args:
+            client_id: The client whose answers are now stale
+
+        Returns:
+            Number of entries invalidated
+        """
+        if not self.enabled:
+            return 0
+
+        key = f"{self.prefix}{client_id}"
+        try:
+            count = self.redis.hlen(key)
+            self.redis.delete(key)
+            return count
+        except Exception as e:
+            print(f"Error invalidating semantic cache: {str(e)}")
+            return 0
+
+    def clear_all(self) -> int:
+        """Clear all semantic cache entries.
+
+        Returns:
+            Number of entries cleared
+        """
+        if not self.enabled:
+            return 0
+
+        try:
+            count = 0
+            for key in self.redis.scan_iter(f"{self.prefix}*", 100):
+                count += self.redis.hlen(key)
+                self.redis.delete(key)
+            return count
+        except Exception as e:
+            print(f"Error clearing semantic cache: {str(e)}")
+            return 0
+
+# Create a singleton instance
+semantic_cache = SemanticCache()
@@ -7,11 +7,6 @@ for use in the vector database and RAG system.
 
 import os
 from typing import Dict, List, Any, Optional
-import numpy as np
-import torch
-from sentence_transformers import SentenceTransformer, InputExample, losses
-from torch.utils.data import DataLoader
-from ..vectordb import get_vectordb
 from .knowledge_base import load_fitness_knowledge
 
 def create_fitness_embeddings(force_refresh: bool = False) -> Dict[str, int]:
@@ -23,6 +18,9 @@ def create_fitness_embeddings(force_refresh: bool = False) -> Dict[str, int]:
     Returns:
         Dictionary with counts of embeddings created by category
     """
+    # Imported here so importing this module doesn't load faiss and numpy
+    from ..vectordb import get_vectordb
+
     # Get vector database
     vectordb = get_vectordb()
     
@@ -178,6 +176,8 @@ def search_fitness_knowledge(query: str, k: int = 5) -> List[Dict[str, Any]]:
     Returns:
         List of search results with metadata
     """
+    from ..vectordb import get_vectordb
+
     # Get vector database
     vectordb = get_vectordb()
     
@@ -241,6 +241,10 @@ def train_fitness_domain_embedding(output_model_name: str = "fitness-domain-v1",
     Returns:
         Path to the saved model
     """
+    # Training-only dependencies, kept out of the request path
+    from sentence_transformers import SentenceTransformer, InputExample, losses
+    from torch.utils.data import DataLoader
+    
     # Load fitness knowledge
     knowledge = load_fitness_knowledge()
     
@@ -319,6 +323,7 @@ def train_fitness_domain_embedding(output_model_name: str = "fitness-domain-v1",
     print(f"Fitness domain embedding model saved to {output_path}")
     
     # Update the vector database to use the new model
+    from ..vectordb import get_vectordb
     vectordb = get_vectordb(embedding_model=output_path)
     
     # Recreate embeddings with the new model
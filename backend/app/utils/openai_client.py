@@ -0,0 +1,68 @@
+"""
+OpenAI Client Module
+
+This module owns the process-wide AsyncOpenAI client. Every OpenAI call in the
+app goes through one pooled httpx client, so keep-alive connections (and their
+TLS handshakes) are reused across requests, and concurrent calls can share an
+HTTP/2 connection.
+
+Environment variables:
+- OPENAI_API_KEY: Your OpenAI API key
+- OPENAI_TIMEOUT: (Optional) Request timeout in seconds (default: 60)
+"""
+
+import os
+import asyncio
+import logging
+from typing import Optional, TYPE_CHECKING
+import httpx
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+logger = logging.getLogger(__name__)
+
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "60"))
+
+_client: Optional["AsyncOpenAI"] = None
+# The event loop _client's connection pool belongs to
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+def get_openai_client() -> "AsyncOpenAI":
+    """Get or create the shared AsyncOpenAI client for the running event loop.
+    
+    An httpx pool can't be used from a loop other than the one it was opened
+    on, so a new loop (a test, or a server restarted in-process) gets a new
+    client instead of failing on the old one's connections.
+    """
+    global _client, _client_loop
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    if _client is None or _client_loop is not loop:
+        # Imported on first use so app startup doesn't pay for the SDK
+        from openai import AsyncOpenAI
+
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            # Return a dummy key for development if no API key is provided
+            logger.warning("No OpenAI API key found. AI features will not work properly.")
+            api_key = "dummy_key_for_development"
+        timeout = httpx.Timeout(OPENAI_TIMEOUT, connect=5.0)
+        http_client = httpx.AsyncClient(
+            http2=True,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50, keepalive_expiry=300.0)
+        )
+        _client = AsyncOpenAI(api_key=api_key, http_client=http_client, timeout=timeout)
+        _client_loop = loop
+    return _client
+
+async def close_openai_client() -> None:
+    """Close the shared client's connections; the next call builds a new one."""
+    global _client, _client_loop
+    if _client is not None:
+        await _client.close()
+        _client = None
+        _client_loop = None
@@ -2,12 +2,35 @@
 Password utilities.
 
 This module provides functions for hashing and verifying passwords.
+The async variants run the hashing on a worker pool so its CPU cost
+doesn't stall every other request on the event loop.
 """
 
+import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException, status
+from typing import Optional, Tuple
 from passlib.context import CryptContext
 
-# Password context for hashing and verification
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password context for hashing and verification. New hashes use Argon2id
+# (OWASP profile: 8 MiB, 3 passes); bcrypt hashes still verify and are
+# marked deprecated so login can upgrade them
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    deprecated="auto",
+    argon2__type="ID",
+    argon2__time_cost=3,
+    argon2__memory_cost=8192,
+    argon2__parallelism=1,
+)
+
+# argon2-cffi and bcrypt release the GIL while hashing, so threads use every core
+hash_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="password-hash")
+
+# Hashes allowed to wait for a worker before callers get a 503
+MAX_PENDING_HASHES = int(os.getenv("MAX_PENDING_HASHES", 500))
+_pending_hashes = 0
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
@@ -22,9 +45,23 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password and rehash it if its hash uses a deprecated scheme.
+    
+    Args:
+        plain_password: The plain text password to check
+        hashed_password: The hashed password to compare against
+        
+    Returns:
+        (matches, new_hash), where new_hash is the Argon2id hash to store
+        in place of a legacy bcrypt hash, or None if no update is needed
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
 def get_password_hash(password: str) -> str:
     """
-    Hash a password using bcrypt.
+    Hash a password using Argon2id.
     
     Args:
         password: The plain text password to hash
@@ -32,4 +69,66 @@ def get_password_hash(password: str) -> str:
     Returns:
         The hashed password
     """
-    return pwd_context.hash(password) 
\ No newline at end of file
+    return pwd_context.hash(password)
+
+async def _run_hash(func, *args):
+    """Run a hashing function on the worker pool, shedding load when it's backed up."""
+    global _pending_hashes
+    if _pending_hashes >= MAX_PENDING_HASHES:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please retry",
+            headers={"Retry-After": "1"},
+        )
+    _pending_hashes += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(hash_executor, func, *args)
+    finally:
+        _pending_hashes -= 1
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verify a password off the event loop.
+    
+    Args:
+        plain_password: The plain text password to check
+        hashed_password: The hashed password to compare against
+        
+    Returns:
+        True if the password matches, False otherwise
+        
+    Raises:
+        HTTPException: 503 if too many hashes are already waiting
+    """
+    return await _run_hash(verify_password, plain_password, hashed_password)
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password off the event loop, rehashing legacy hashes.
+    
+    Args:
+        plain_password: The plain text password to check
+        hashed_password: The hashed password to compare against
+        
+    Returns:
+        (matches, new_hash) as for verify_and_update_password
+        
+    Raises:
+        HTTPException: 503 if too many hashes are already waiting
+    """
+    return await _run_hash(verify_and_update_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """
+    Hash a password off the event loop.
+    
+    Args:
+        password: The plain text password to hash
+        
+    Returns:
+        The hashed password
+        
+    Raises:
+        HTTPException: 503 if too many hashes are already waiting
+    """
+    return await _run_hash(get_password_hash, password)
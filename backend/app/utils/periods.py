@@ -0,0 +1,40 @@
+"""
+Time period utilities.
+
+This module decodes the time_period query values ("7d", "30d", ..., "all")
+accepted by the analytics endpoints.
+"""
+
+from types import MappingProxyType
+from typing import Optional, Sequence
+from fastapi import HTTPException, status
+
+# Days covered by each time_period value; None means no lower bound
+PERIOD_DAYS = MappingProxyType({
+    "7d": 7,
+    "30d": 30,
+    "90d": 90,
+    "180d": 180,
+    "365d": 365,
+    "all": None,
+})
+
+def period_days(time_period: str, allowed: Sequence[str]) -> Optional[int]:
+    """Get the number of days covered by a time_period.
+
+    Args:
+        time_period: The time_period query value
+        allowed: The values the endpoint accepts, in the order shown in errors
+
+    Returns:
+        The number of days, or None for "all"
+
+    Raises:
+        HTTPException: 400 if time_period is not one of allowed
+    """
+    if time_period not in allowed:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid time_period. Must be one of: {', '.join(allowed)}"
+        )
+    return PERIOD_DAYS[time_period]
@@ -16,10 +16,10 @@ LLM responses with domain-specific knowledge.
 import os
 import json
 import pickle
+import threading
 import numpy as np
 from typing import List, Dict, Any, Optional, Tuple
 import faiss
-from sentence_transformers import SentenceTransformer
 from datetime import datetime
 
 # Define path for storing the vector database
@@ -44,6 +44,9 @@ class FitnessVectorDB:
         self.embedding_model_name = embedding_model or EMBEDDING_MODEL
         print(f"Initializing vector database with model: {self.embedding_model_name}")
         
+        # Imported here so the torch stack only loads once RAG is first used
+        from sentence_transformers import SentenceTransformer
+        
         # Load embedding model
         try:
             self.embedding_model = SentenceTransformer(self.embedding_model_name)
@@ -268,8 +271,10 @@ class FitnessVectorDB:
             print(f"Error clearing vector database: {str(e)}")
             return False
 
-# Singleton instance
+# Singleton instance; the lock stops threads that ask for it at the same time
+# from each loading the embedding model
 _vectordb = None
+_vectordb_lock = threading.Lock()
 
 def get_vectordb() -> FitnessVectorDB:
     """Get or create the singleton vector database instance.
@@ -279,5 +284,7 @@ def get_vectordb() -> FitnessVectorDB:
     """
     global _vectordb
     if _vectordb is None:
-        _vectordb = FitnessVectorDB()
+        with _vectordb_lock:
+            if _vectordb is None:
+                _vectordb = FitnessVectorDB()
     return _vectordb 
\ No newline at end of file